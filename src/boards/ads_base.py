@@ -1,29 +1,94 @@
 import time
 import threading
+import numpy as np
 from loguru import logger
 from adafruit_ads1x15.analog_in import AnalogIn
 import adafruit_ads1x15.ads1115 as ADS1115_MODULE
 import adafruit_ads1x15.ads1015 as ADS1015_MODULE
+from utils.sample_buffer import SampleBuffer, shared_buffer_name
+from utils.acquisition_stats import AcquisitionStats
+from boards.bus_arbiter import BusArbiter, PRIORITY_SAMPLING
+from boards.ads_drivers import AdafruitADSDriver, SMBusADSDriver
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
 
 ADS1115_PIN_NUMBERS = {0: ADS1115_MODULE.P0, 1: ADS1115_MODULE.P1, 2: ADS1115_MODULE.P2, 3: ADS1115_MODULE.P3}
 ADS1015_PIN_NUMBERS = {0: ADS1015_MODULE.P0, 1: ADS1015_MODULE.P1, 2: ADS1015_MODULE.P2, 3: ADS1015_MODULE.P3}
 
+# ADS1x15 register map and config word fields (datasheet section 9.6)
+_CONVERSION_REGISTER = 0x00
+_CONFIG_REGISTER = 0x01
+_LO_THRESH_REGISTER = 0x02
+_HI_THRESH_REGISTER = 0x03
+
+_CONFIG_OS_SINGLE = 0x8000  # Start a single conversion
+_CONFIG_MUX_OFFSET = 12
+_CONFIG_MODE_CONTINUOUS = 0x0000
+_CONFIG_MODE_SINGLE = 0x0100
+_CONFIG_COMP_QUE_ONE = 0x0000  # Assert ALERT/RDY after every conversion
+_CONFIG_COMP_QUE_DISABLE = 0x0003
+
+_CONFIG_GAIN = {2 / 3: 0x0000, 1: 0x0200, 2: 0x0400, 4: 0x0600, 8: 0x0800, 16: 0x0A00}
+_GAIN_FULL_SCALE = {2 / 3: 6.144, 1: 4.096, 2: 2.048, 4: 1.024, 8: 0.512, 16: 0.256}
+
+ADS1115_DATA_RATES = {8: 0x0000, 16: 0x0020, 32: 0x0040, 64: 0x0060, 128: 0x0080, 250: 0x00A0, 475: 0x00C0, 860: 0x00E0}
+ADS1015_DATA_RATES = {128: 0x0000, 250: 0x0020, 490: 0x0040, 920: 0x0060, 1600: 0x0080, 2400: 0x00A0, 3300: 0x00C0}
+
+SAMPLE_RATE_WINDOW = 1.0  # Seconds between effective sample rate updates
+CONVERSION_TIME_MARGIN = 1.1  # The internal oscillator may run up to 10% slow
+
+
 class ADSBase:
-    def __init__(self, i2c, config, app_config):
+    def __init__(self, i2c, config, app_config, bus_arbiter=None, shared=False):
         self.i2c = i2c
+        self.bus_arbiter = bus_arbiter or BusArbiter(i2c)
         self.board_id = config['id']
         self.i2c_address = int(config['i2c_address'], 16)
         self.label = config.get('label', 'Unknown')
         self.location = config.get('location', 'Unknown')
         self.purpose = config.get('purpose', 'Unknown')
-        self.readings = {pin: [] for pin in range(4)}
         self.is_initialized = False
         self.lock = threading.Lock()
         self._stop_thread = threading.Event()
 
-        self.ads = self._initialize_ads()
+        # Every pin is sampled with equal weight until a sampling plan says otherwise
+        self.sampling_plan = {pin: 1 for pin in range(4)}
+        self.pins = sorted(self.sampling_plan)
+        self._plan_changed = threading.Event()
+        self._plan_changed.set()
+        self.sample_rates = {pin: 0.0 for pin in range(4)}
+        self._sample_counts = {pin: 0 for pin in range(4)}
+        self._rate_window_start = time.monotonic()
+        self._conversion_ready = threading.Event()
+        self._last_config = None
+        self._config_words = {}
+        self._alert_enabled = False
+        self.ready_timeouts = 0
+        self._listeners = {pin: [] for pin in range(4)}
+        self.acquisition_stats = {pin: AcquisitionStats() for pin in range(4)}
+        self.read_errors = {pin: 0 for pin in range(4)}
+
+        self.driver_name = config.get('driver', 'adafruit')
+        self.gain = config.get('gain', 1)
+        self.full_scale = _GAIN_FULL_SCALE[self.gain]
+        # An input cannot go above VDD, so with gain 1 (4.096 V) a 3.3 V board rails at 3.3 V
+        self.supply_voltage = config.get('supply_voltage', 3.3)
+        self.ads = self._initialize_ads() if self.driver_name != 'smbus2' else None
+        self.driver = self._create_driver(config)
         self._configure_settings(app_config)
-        
+        self._configure_acquisition(config, app_config)
+        if shared:
+            # Published for the main app and tools running in other processes
+            self.buffer = SampleBuffer.create_shared(shared_buffer_name(self.board_id), len(self.PIN_NUMBERS), self.max_readings)
+            logger.info(f"🧠 {self.__class__.__name__} {self.label} publishing samples to shared memory '{shared_buffer_name(self.board_id)}'")
+        else:
+            self.buffer = SampleBuffer(len(self.PIN_NUMBERS), self.max_readings)
+        self._publish_plan()
+        self.buffer.set_field('data_rate', self.data_rate)
+
         self.thread = threading.Thread(target=self.poll_pins)
         self.thread.start()
 
@@ -33,25 +98,273 @@ class ADSBase:
     def _configure_settings(self, app_config):
         raise NotImplementedError("Subclasses must implement this method")
 
+    def _create_driver(self, config):
+        if self.driver_name == 'smbus2':
+            try:
+                driver = SMBusADSDriver(self.i2c_address, config.get('i2c_bus', 1))
+                logger.info(f"🔮 Initialized {self.__class__.__name__} {self.label} at {hex(self.i2c_address)} with the smbus2 register driver")
+                return driver
+            except Exception as e:
+                logger.error(f"💢 Failed to open smbus2 driver for {self.__class__.__name__} {self.label}: {str(e)}")
+                raise e
+        if self.driver_name != 'adafruit':
+            logger.warning(f"⚠️ Unknown ADS driver '{self.driver_name}' for {self.label}, using the Adafruit driver")
+            self.driver_name = 'adafruit'
+        self.ads.gain = self.gain
+        return AdafruitADSDriver(self.ads)
+
+    def _configure_acquisition(self, config, app_config):
+        settings = app_config[self.SETTINGS_KEY]
+        self.acquisition_mode = config.get('acquisition_mode', settings.get('ACQUISITION_MODE', 'single_shot'))
+        self.alert_pin = config.get('alert_pin')
+        if self.acquisition_mode == 'continuous':
+            self.data_rate = settings.get('CONTINUOUS_DATA_RATE', max(self.DATA_RATES))
+        self.data_rate = self._supported_rate(self.data_rate)
+
+        # Adaptive acquisition idles at the normal rate and escalates while a sensor needs it
+        self.adaptive_data_rate = settings.get('ADAPTIVE_DATA_RATE', False)
+        self.normal_data_rate = self.data_rate
+        self.fast_data_rate = self._supported_rate(settings.get('FAST_DATA_RATE', max(self.DATA_RATES)))
+        self.rate_hold_off = settings.get('RATE_HOLD_OFF', 5.0)
+
+    def _supported_rate(self, data_rate):
+        if data_rate not in self.DATA_RATES:
+            logger.warning(f"⚠️ {data_rate} SPS is not supported by {self.__class__.__name__} {self.label}, using {max(self.DATA_RATES)} SPS")
+            return max(self.DATA_RATES)
+        return data_rate
+
+    def escalate_data_rate(self):
+        """Sample at the fast data rate until the hold-off period has passed without another escalation."""
+        if self.adaptive_data_rate:
+            # Kept in the buffer header so a reader in another process can escalate too
+            self.buffer.set_field('fast_until_ns', time.monotonic_ns() + int(self.rate_hold_off * 1e9))
+
+    def _apply_adaptive_rate(self):
+        fast = time.monotonic_ns() < self.buffer.get_field('fast_until_ns')
+        data_rate = self.fast_data_rate if fast else self.normal_data_rate
+        if data_rate != self.data_rate:
+            logger.debug(f"🔄 {self.__class__.__name__} {self.label} switching from {self.data_rate} to {data_rate} SPS")
+            self.data_rate = data_rate
+            self.buffer.set_field('data_rate', data_rate)
+            if self.ads is not None:
+                self.ads.data_rate = data_rate
+            self._plan_changed.set()
+
+    def set_sampling_plan(self, plan):
+        """Sample only the pins in plan, a {pin: weight} dict.
+
+        The converter's full data rate is shared between the planned pins in proportion to
+        their weights; pins left out of the plan are not sampled at all.
+        """
+        plan = {pin: weight for pin, weight in plan.items() if pin in self.PIN_NUMBERS and weight > 0}
+        with self.lock:
+            self.sampling_plan = plan
+            self.pins = sorted(plan)
+            for pin in range(4):
+                self.sample_rates[pin] = 0.0
+            self._publish_plan()
+        self._plan_changed.set()
+        if plan:
+            logger.info(f"📋 {self.__class__.__name__} {self.label} sampling plan: "
+                        + ", ".join(f"pin {pin} x{weight}" for pin, weight in sorted(plan.items())))
+        else:
+            logger.info(f"📋 {self.__class__.__name__} {self.label} has no pins to sample, pausing acquisition")
+
+    def _publish_plan(self):
+        self.buffer.set_field('pin_mask', sum(1 << pin for pin in self.pins))
+        self.buffer.rates[:] = 0.0
+
+    def _pin_periods(self):
+        with self.lock:
+            plan = dict(self.sampling_plan)
+        total_weight = sum(plan.values())
+        return {pin: total_weight / (weight * self.data_rate) for pin, weight in plan.items()}
+
     def read_pins(self):
-        self.ads.data_rate = self.data_rate
-        logger.info(f"🔄 Polling {self.__class__.__name__} {self.label} at {self.data_rate} SPS")
+        continuous = self.acquisition_mode == 'continuous'
+        if continuous:
+            self._start_continuous()
+            read_pin = self._read_continuous
+            detail = f"continuously ({'ALERT/RDY on GPIO ' + str(self.alert_pin) if self._alert_enabled else 'timed fallback'})"
+        else:
+            if self.ads is not None:
+                self.ads.data_rate = self.data_rate
+            read_pin = self._read_single_shot
+            detail = "in single-shot mode"
+        logger.info(f"🔄 Sampling {self.__class__.__name__} {self.label} {detail} at {self.data_rate} SPS ({self.driver_name} driver)")
+        try:
+            self._run_schedule(read_pin)
+        finally:
+            if continuous:
+                self._stop_continuous()
+
+    def _run_schedule(self, read_pin):
+        """Sample the planned pins on an earliest-deadline-first schedule.
+
+        Each pin is due every total_weight / (weight * data_rate) seconds. In continuous mode
+        a conversion is collected when ALERT/RDY fires, or after a timed fallback when no GPIO
+        edge is available.
+        """
+        periods = {}
+        next_due = {}
         while not self._stop_thread.is_set():
-            for pin in range(4):
-                try:
-                    reading = AnalogIn(self.ads, self.PIN_NUMBERS[pin]).voltage
-                    with self.lock:
-                        self.readings[pin].append(reading)
-                        if len(self.readings[pin]) > self.max_readings:
-                            self.readings[pin].pop(0)
-                except Exception as e:
-                    logger.error(f"Error reading pin {pin} on {self.__class__.__name__} {self.label}: {e}")
-            
-            if not self.is_initialized and all(len(readings) >= self.max_readings for readings in self.readings.values()):
-                self.is_initialized = True
-                logger.info(f"✅ {self.__class__.__name__} {self.label} initialized with {self.max_readings} readings per pin")
-            
-            time.sleep(1.0 / self.data_rate)
+            if self.adaptive_data_rate:
+                self._apply_adaptive_rate()
+            if self._plan_changed.is_set():
+                self._plan_changed.clear()
+                periods = self._pin_periods()
+                cycle = max(periods.values(), default=0)
+                now = time.monotonic()
+                next_due = {pin: now for pin in periods}
+                for planned_pin, period in periods.items():
+                    self.acquisition_stats[planned_pin].set_expected_period(period)
+            if not next_due:
+                self._stop_thread.wait(0.5)
+                continue
+
+            pin = min(next_due, key=next_due.get)
+            delay = next_due[pin] - time.monotonic()
+            if delay > 0 and self._stop_thread.wait(delay):
+                break
+            if -delay > periods[pin]:
+                self.acquisition_stats[pin].record_missed_deadline()
+            if -delay > cycle:
+                # Fell more than a full cycle behind: shift every deadline together instead of
+                # bursting to catch up, which keeps the pins' shares in proportion to their weights
+                self.acquisition_stats[pin].record_overrun()
+                for planned_pin in next_due:
+                    next_due[planned_pin] -= delay
+
+            try:
+                reading = read_pin(pin)
+                self._store_reading(pin, reading, time.monotonic_ns())
+            except Exception as e:
+                self.read_errors[pin] += 1
+                logger.error(f"Error reading pin {pin} on {self.__class__.__name__} {self.label}: {e}")
+
+            next_due[pin] += periods[pin]
+            self._check_initialized()
+
+    def _read_single_shot(self, pin):
+        if self.ads is not None:
+            # The Adafruit driver polls for the end of the conversion over I2C, holding the bus throughout
+            with self.bus_arbiter.transaction(self.label, PRIORITY_SAMPLING):
+                return AnalogIn(self.ads, self.PIN_NUMBERS[pin]).voltage
+        self._write_config(self._config_word(pin, continuous=False))
+        time.sleep(CONVERSION_TIME_MARGIN / self.data_rate)
+        return self._to_voltage(self._read_register(_CONVERSION_REGISTER))
+
+    def _start_continuous(self):
+        # Hi_thresh MSB set and Lo_thresh MSB clear turns ALERT/RDY into a conversion-ready pin
+        self._write_register(_HI_THRESH_REGISTER, 0x8000)
+        self._write_register(_LO_THRESH_REGISTER, 0x0000)
+        self._last_config = None
+        self._alert_enabled = False
+        if self.alert_pin is None:
+            return
+        if GPIO is None:
+            logger.warning(f"⚠️ RPi.GPIO not available, {self.label} falls back to timed conversion reads")
+            return
+        try:
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.alert_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(self.alert_pin, GPIO.FALLING, callback=self._on_conversion_ready)
+            self._alert_enabled = True
+        except Exception as e:
+            logger.error(f"💢 Failed to watch ALERT/RDY on GPIO {self.alert_pin} for {self.label}: {e}")
+
+    def _stop_continuous(self):
+        if self._alert_enabled:
+            try:
+                GPIO.remove_event_detect(self.alert_pin)
+                GPIO.cleanup(self.alert_pin)
+            except Exception as e:
+                logger.error(f"💢 Failed to release ALERT/RDY GPIO {self.alert_pin} for {self.label}: {e}")
+            self._alert_enabled = False
+        try:
+            # Back to single-shot mode so the converter powers down between reads
+            self._write_config(self._config_word(0, continuous=False))
+        except Exception as e:
+            logger.error(f"💢 Failed to power down {self.__class__.__name__} {self.label}: {e}")
+
+    def _on_conversion_ready(self, channel):
+        self._conversion_ready.set()
+
+    def _read_continuous(self, pin):
+        config_word = self._config_word(pin, continuous=True)
+        if config_word != self._last_config:
+            # Writing the config register restarts the conversion with the new mux setting
+            self._conversion_ready.clear()
+            self._write_config(config_word)
+        self._wait_for_conversion()
+        return self._to_voltage(self._read_register(_CONVERSION_REGISTER))
+
+    def _to_voltage(self, raw):
+        if raw & 0x8000:
+            raw -= 1 << 16
+        return raw * _GAIN_FULL_SCALE[self.gain] / 32767
+
+    def _wait_for_conversion(self):
+        conversion_time = 1.0 / self.data_rate
+        if self._alert_enabled:
+            if not self._conversion_ready.wait(conversion_time * 2):
+                self.ready_timeouts += 1
+            self._conversion_ready.clear()
+        else:
+            time.sleep(conversion_time * CONVERSION_TIME_MARGIN)
+
+    def _config_word(self, pin, continuous):
+        """Config register value for a mux/gain/rate/mode combination, packed once and cached."""
+        key = (pin, continuous, self.gain, self.data_rate)
+        word = self._config_words.get(key)
+        if word is None:
+            word = ((pin + 0x04) << _CONFIG_MUX_OFFSET) | _CONFIG_GAIN[self.gain] | self.DATA_RATES[self.data_rate]
+            if continuous:
+                word |= _CONFIG_MODE_CONTINUOUS | _CONFIG_COMP_QUE_ONE
+            else:
+                word |= _CONFIG_OS_SINGLE | _CONFIG_MODE_SINGLE | _CONFIG_COMP_QUE_DISABLE
+            self._config_words[key] = word
+        return word
+
+    def _write_config(self, word):
+        """Write the config register, skipping the transaction when the chip already holds this word."""
+        if word == self._last_config and not word & _CONFIG_OS_SINGLE:
+            return False
+        self._write_register(_CONFIG_REGISTER, word)
+        self._last_config = word
+        return True
+
+    def _write_register(self, register, value):
+        with self.bus_arbiter.transaction(self.label, PRIORITY_SAMPLING):
+            self.driver.write_register(register, value)
+
+    def _read_register(self, register):
+        with self.bus_arbiter.transaction(self.label, PRIORITY_SAMPLING):
+            return self.driver.read_register(register)
+
+    def _store_reading(self, pin, reading, timestamp_ns):
+        self.acquisition_stats[pin].record(timestamp_ns)
+        with self.lock:
+            self.buffer.push(pin, reading, timestamp_ns)
+            self._sample_counts[pin] += 1
+            for listener in self._listeners[pin]:
+                listener.push(reading)
+
+    def _check_initialized(self):
+        now = time.monotonic()
+        elapsed = now - self._rate_window_start
+        if elapsed >= SAMPLE_RATE_WINDOW:
+            with self.lock:
+                for pin in self._sample_counts:
+                    self.sample_rates[pin] = self._sample_counts[pin] / elapsed
+                    self.buffer.rates[pin] = self.sample_rates[pin]
+                    self._sample_counts[pin] = 0
+            self._rate_window_start = now
+
+        if not self.is_initialized and all(self.buffer.available(pin) >= self.max_readings for pin in self.pins):
+            self.is_initialized = True
+            self.buffer.set_field('initialized', 1)
+            logger.info(f"✅ {self.__class__.__name__} {self.label} initialized with {self.max_readings} readings per pin")
 
     def poll_pins(self):
         try:
@@ -61,7 +374,54 @@ class ADSBase:
 
     def get_readings(self, pin):
         with self.lock:
-            return list(self.readings[pin])
+            return self.buffer.get_window(pin, self.max_readings).tolist()
+
+    def get_window(self, pin, n):
+        """Newest n readings of a pin as a NumPy array, copied under the lock."""
+        with self.lock:
+            return np.array(self.buffer.get_window(pin, n))
+
+    def get_timestamps(self, pin, n):
+        """time.monotonic_ns() timestamps of the newest n readings of a pin, copied under the lock."""
+        with self.lock:
+            return np.array(self.buffer.get_timestamps(pin, n))
+
+    def get_samples(self, pin, n):
+        """Newest n readings of a pin and their timestamps from one locked read, so they always match."""
+        with self.lock:
+            return self.buffer.get_samples(pin, n)
+
+    def get_window_matrix(self, pins, n):
+        """Newest n readings of several pins as one (pins, n) array, for vectorised detection."""
+        with self.lock:
+            return self.buffer.get_window_matrix(pins, n)
+
+    def add_sample_listener(self, pin, listener):
+        """Call listener.push(value) for every new reading on a pin, from the sampling thread.
+
+        The listener is first fed the readings already buffered so it starts out warm.
+        """
+        with self.lock:
+            for reading in self.buffer.get_window(pin, self.max_readings):
+                listener.push(float(reading))
+            self._listeners[pin].append(listener)
+
+    def get_sequence(self, pin):
+        """Number of readings taken on a pin so far; changes whenever new data arrives."""
+        return self.buffer.sequence(pin)
+
+    def get_sample_rates(self):
+        """Effective samples per second achieved for each planned pin over the last rate window."""
+        with self.lock:
+            return {pin: self.sample_rates[pin] for pin in self.pins}
+
+    def get_read_errors(self):
+        """Failed reads of each pin since the board started."""
+        return dict(self.read_errors)
+
+    def get_acquisition_stats(self):
+        """Inter-sample interval percentiles, gaps, missed deadlines and overruns for each planned pin."""
+        return {pin: self.acquisition_stats[pin].report() for pin in self.pins}
 
     def stop(self):
         logger.info(f"🛑 Stopping {self.__class__.__name__} polling thread")
@@ -75,9 +435,14 @@ class ADSBase:
     def cleanup(self):
         logger.info(f"Cleaning up {self.__class__.__name__} board {self.board_id}")
         self.stop()
+        self.driver.close()
+        if not self.thread.is_alive():
+            self.buffer.close()
 
 class ADS1115(ADSBase):
     PIN_NUMBERS = ADS1115_PIN_NUMBERS
+    DATA_RATES = ADS1115_DATA_RATES
+    SETTINGS_KEY = 'ADS1115_SETTINGS'
 
     def _initialize_ads(self):
         try:
@@ -95,6 +460,8 @@ class ADS1115(ADSBase):
 
 class ADS1015(ADSBase):
     PIN_NUMBERS = ADS1015_PIN_NUMBERS
+    DATA_RATES = ADS1015_DATA_RATES
+    SETTINGS_KEY = 'ADS1015_SETTINGS'
 
     def _initialize_ads(self):
         try:
@@ -108,4 +475,4 @@ class ADS1015(ADSBase):
     def _configure_settings(self, app_config):
         settings = app_config['ADS1015_SETTINGS']
         self.data_rate = settings['NORMAL_DATA_RATE']
-        self.max_readings = settings['MAX_READINGS']
\ No newline at end of file
+        self.max_readings = settings['MAX_READINGS']
@@ -0,0 +1,49 @@
+from smbus2 import SMBus, i2c_msg
+
+class AdafruitADSDriver:
+    """Raw ADS1x15 register access through the Adafruit object's busio I2C device."""
+
+    name = 'adafruit'
+
+    def __init__(self, ads):
+        self.ads = ads
+
+    def write_register(self, register, value):
+        with self.ads.i2c_device as device:
+            device.write(bytes([register, (value >> 8) & 0xFF, value & 0xFF]))
+
+    def read_register(self, register):
+        buffer = bytearray(2)
+        with self.ads.i2c_device as device:
+            device.write_then_readinto(bytes([register]), buffer)
+        return (buffer[0] << 8) | buffer[1]
+
+    def close(self):
+        pass
+
+
+class SMBusADSDriver:
+    """Lean ADS1x15 register access straight on /dev/i2c-N through smbus2.
+
+    Register reads are a single combined write/read transaction (repeated start), so the
+    pointer write and the two data bytes go out without releasing the bus in between.
+    """
+
+    name = 'smbus2'
+
+    def __init__(self, address, bus_number=1):
+        self.address = address
+        self.bus = SMBus(bus_number)
+
+    def write_register(self, register, value):
+        self.bus.write_i2c_block_data(self.address, register, [(value >> 8) & 0xFF, value & 0xFF])
+
+    def read_register(self, register):
+        write = i2c_msg.write(self.address, [register])
+        read = i2c_msg.read(self.address, 2)
+        self.bus.i2c_rdwr(write, read)
+        high, low = list(read)
+        return (high << 8) | low
+
+    def close(self):
+        self.bus.close()
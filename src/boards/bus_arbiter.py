@@ -0,0 +1,107 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from loguru import logger
+
+# Lower numbers win the bus first
+PRIORITY_INPUT = 0      # Button reads
+PRIORITY_ACTUATOR = 1   # Servo and LED writes
+PRIORITY_SAMPLING = 2   # Bulk ADC sampling
+
+PRIORITY_NAMES = {PRIORITY_INPUT: 'input', PRIORITY_ACTUATOR: 'actuator', PRIORITY_SAMPLING: 'sampling'}
+
+# Longest a transaction of each class should wait for the bus, in milliseconds
+DEFAULT_LATENCY_BUDGETS_MS = {'input': 2, 'actuator': 5, 'sampling': 50}
+
+BUDGET_WARNING_INTERVAL = 10.0  # Seconds between repeated budget warnings for the same client
+
+
+class BusArbiter:
+    """Owns the shared I2C bus and grants it to one transaction at a time.
+
+    Waiting transactions are served from a priority queue, so a button read or actuator
+    write queued behind ADC sampling goes next instead of racing the sampling threads for
+    the bus lock. Wait and hold times are recorded per client and checked against the
+    latency budget of the transaction's priority class.
+    """
+
+    def __init__(self, i2c=None, settings=None):
+        self.i2c = i2c
+        settings = settings or {}
+        budgets_ms = {**DEFAULT_LATENCY_BUDGETS_MS, **settings.get('LATENCY_BUDGETS_MS', {})}
+        self.latency_budgets = {priority: budgets_ms[name] / 1000.0 for priority, name in PRIORITY_NAMES.items()}
+
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._order = itertools.count()
+        self._busy = False
+        self._started = time.monotonic()
+        self._usage = {}
+        self._last_warning = {}
+
+    @contextmanager
+    def transaction(self, client, priority=PRIORITY_SAMPLING):
+        """Hold the bus for the duration of the with-block."""
+        requested = time.monotonic()
+        with self._condition:
+            ticket = (priority, next(self._order))
+            heapq.heappush(self._waiting, ticket)
+            while self._busy or self._waiting[0] != ticket:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self._busy = True
+        acquired = time.monotonic()
+        try:
+            yield self.i2c
+        finally:
+            released = time.monotonic()
+            with self._condition:
+                self._busy = False
+                self._record(client, priority, acquired - requested, released - acquired)
+                self._condition.notify_all()
+
+    def _record(self, client, priority, waited, held):
+        usage = self._usage.get(client)
+        if usage is None:
+            usage = self._usage[client] = {
+                'priority': PRIORITY_NAMES.get(priority, str(priority)),
+                'transactions': 0,
+                'busy_time': 0.0,
+                'wait_time': 0.0,
+                'max_wait': 0.0,
+                'budget_misses': 0,
+            }
+        usage['transactions'] += 1
+        usage['busy_time'] += held
+        usage['wait_time'] += waited
+        usage['max_wait'] = max(usage['max_wait'], waited)
+
+        budget = self.latency_budgets.get(priority)
+        if budget is not None and waited > budget:
+            usage['budget_misses'] += 1
+            now = time.monotonic()
+            if now - self._last_warning.get(client, 0) > BUDGET_WARNING_INTERVAL:
+                self._last_warning[client] = now
+                logger.warning(f"⚠️ 🚌 {client} waited {waited * 1000:.1f} ms for the I2C bus "
+                               f"(budget {budget * 1000:.1f} ms, {usage['budget_misses']} misses)")
+
+    def get_usage(self):
+        """Per-client transaction counts, wait times and share of wall-clock time spent on the bus."""
+        with self._condition:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            return {
+                client: {
+                    **usage,
+                    'bus_share': usage['busy_time'] / elapsed,
+                    'mean_wait': usage['wait_time'] / usage['transactions'] if usage['transactions'] else 0.0,
+                }
+                for client, usage in self._usage.items()
+            }
+
+    def log_usage(self):
+        for client, usage in sorted(self.get_usage().items(), key=lambda item: -item[1]['bus_share']):
+            logger.info(f"🚌 {client} ({usage['priority']}): {usage['bus_share'] * 100:.1f}% of bus, "
+                        f"{usage['transactions']} transactions, max wait {usage['max_wait'] * 1000:.1f} ms, "
+                        f"{usage['budget_misses']} budget misses")
@@ -0,0 +1,129 @@
+import threading
+
+# Stand-ins for an MCP23017 and RPi.GPIO, to run button input without the hardware.
+#
+# Pass a FakeMCP23017 as both mcp= and device= of boards.mcp23017.MCP23017, and a FakeGPIO
+# as gpio= of ButtonManager. press() and release() change the input levels; with interrupts
+# enabled the chip latches INTCAP and pulls its INT line like the real one, which fires the
+# FakeGPIO callback registered for that line.
+
+_INTCAPA = 0x10
+_GPIOA = 0x12
+
+class FakePin:
+    def __init__(self, chip, pin):
+        self.chip = chip
+        self.pin = pin
+        self.direction = None
+        self.pull = None
+
+    @property
+    def value(self):
+        return bool(self.chip.levels >> self.pin & 1)
+
+    @value.setter
+    def value(self, value):
+        self.chip.set_level(self.pin, value)
+
+
+class FakeMCP23017:
+    """Register model of the MCP23017 with its inputs pulled up, for the parts the boards use.
+
+    An interrupt is raised on the first change of an enabled pin while none is pending:
+    INTCAP takes the port value at that moment and stays put until the interrupt is
+    cleared by reading INTCAP or GPIO, as on the chip.
+    """
+
+    def __init__(self, gpio=None, interrupt_pin=None):
+        self.gpio_backend = gpio
+        self.interrupt_pin = interrupt_pin
+        self.levels = 0xFFFF
+        self.intcap = 0x0000
+        self.pending = False
+        self.io_control = 0x00
+        self.interrupt_configuration = 0x0000
+        self.default_value = 0x0000
+        self.interrupt_enable = 0x0000
+        self.reads = 0
+        self.lock = threading.Lock()
+
+    def get_pin(self, pin):
+        return FakePin(self, pin)
+
+    @property
+    def gpio(self):
+        with self.lock:
+            self.reads += 1
+            self.pending = False
+            return self.levels
+
+    def press(self, pin):
+        self.set_level(pin, False)
+
+    def release(self, pin):
+        self.set_level(pin, True)
+
+    def set_level(self, pin, level):
+        with self.lock:
+            old = self.levels
+            self.levels = (old & ~(1 << pin)) | (int(bool(level)) << pin)
+            fire = bool((old ^ self.levels) & self.interrupt_enable) and not self.pending
+            if fire:
+                self.intcap = self.levels
+                self.pending = True
+        if fire and self.gpio_backend is not None:
+            self.gpio_backend.trigger(self.interrupt_pin)
+
+    # I2CDevice interface, for the raw register reads
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def write_then_readinto(self, out_buffer, in_buffer):
+        with self.lock:
+            self.reads += 1
+            registers = {
+                _INTCAPA: self.intcap & 0xFF,
+                _INTCAPA + 1: self.intcap >> 8,
+                _GPIOA: self.levels & 0xFF,
+                _GPIOA + 1: self.levels >> 8,
+            }
+            for offset in range(len(in_buffer)):
+                register = out_buffer[0] + offset
+                in_buffer[offset] = registers.get(register, 0)
+                if register in (_INTCAPA, _INTCAPA + 1, _GPIOA, _GPIOA + 1):
+                    self.pending = False
+
+
+class FakeGPIO:
+    """The part of RPi.GPIO that ButtonManager uses for interrupt lines."""
+
+    BCM = 'BCM'
+    IN = 'IN'
+    PUD_UP = 'PUD_UP'
+    FALLING = 'FALLING'
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None):
+        pass
+
+    def add_event_detect(self, pin, edge, callback=None):
+        self.callbacks[pin] = callback
+
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self, pin=None):
+        pass
+
+    def trigger(self, pin):
+        callback = self.callbacks.get(pin)
+        if callback:
+            callback(pin)
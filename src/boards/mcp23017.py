@@ -1,17 +1,30 @@
 import adafruit_mcp230xx.mcp23017 as MCP
+from adafruit_bus_device.i2c_device import I2CDevice
 import board
 import busio
 from digitalio import Direction, Pull
 from loguru import logger
+from boards.bus_arbiter import BusArbiter, PRIORITY_INPUT
+
+# MCP23017 registers with IOCON.BANK = 0, where each A register is followed by its B register
+_INTCAPA = 0x10  # INTCAPA, INTCAPB, GPIOA, GPIOB are consecutive
+_IOCON_MIRROR = 0x40  # INTA and INTB both fire for either port
+_IOCON_ODR = 0x04     # Open-drain interrupt outputs, so several boards can share one Pi pin
 
 class MCP23017:
-    def __init__(self, i2c, config, app_config):
+    def __init__(self, i2c, config, app_config, bus_arbiter=None, mcp=None, device=None):
+        self.bus_arbiter = bus_arbiter or BusArbiter(i2c)
         self.i2c_address = int(config['i2c_address'], 16)
         self.label = config.get('label', 'Unknown')
+        # Pi GPIO (BCM) wired to INTA/INTB, for interrupt-driven button input
+        self.interrupt_pin = config.get('interrupt_pin')
         self.pins = {}
 
         try:
-            self.mcp = MCP.MCP23017(i2c, address=self.i2c_address)
+            # A backend can be passed in to run without the hardware, see boards.fake_mcp23017
+            self.mcp = mcp or MCP.MCP23017(i2c, address=self.i2c_address)
+            # Our own handle on the chip for the INTCAP + GPIO burst, which the driver has no call for
+            self.device = device or I2CDevice(i2c, self.i2c_address)
             logger.info(f"🔮 Initialized MCP23017 {self.label} at {hex(self.i2c_address)}")
         except Exception as e:
             logger.error(f"💢 Failed to initialize MCP23017 {self.label} at address {hex(self.i2c_address)}: {str(e)}")
@@ -31,11 +44,48 @@ class MCP23017:
 
     def read_input(self, pin):
         """Read the value from an input pin."""
-        return self.pins[pin].value
+        with self.bus_transaction():
+            return self.pins[pin].value
+
+    def read_port(self):
+        """Read GPIOA and GPIOB in one 2-byte transaction; bit n of the result is pin n."""
+        with self.bus_transaction():
+            return self.mcp.gpio
+
+    def enable_interrupts(self, pin_mask):
+        """Raise INTA/INTB on any change of the pins in pin_mask."""
+        with self.bus_transaction():
+            self.mcp.io_control = _IOCON_MIRROR | _IOCON_ODR
+            self.mcp.interrupt_configuration = 0x0000  # Compare with the previous pin value, not DEFVAL
+            self.mcp.default_value = 0xFFFF  # Idle level of the pulled-up inputs
+            self.mcp.interrupt_enable = pin_mask
+            self.mcp.gpio  # Reading the port clears anything pending
+        logger.info(f"⚡ MCP23017 {self.label} interrupts enabled for pins {pin_mask:#06x} on GPIO {self.interrupt_pin}")
+
+    def disable_interrupts(self):
+        with self.bus_transaction():
+            self.mcp.interrupt_enable = 0x0000
+
+    def read_interrupt_capture(self):
+        """Return (port value latched when the interrupt fired, current port value).
+
+        INTCAP keeps a press that was already released by the time we got here. Both
+        come from one 4-byte read, and reading GPIO clears the interrupt.
+        """
+        buffer = bytearray(4)
+        with self.bus_transaction():
+            with self.device as device:
+                device.write_then_readinto(bytes([_INTCAPA]), buffer)
+        return buffer[0] | (buffer[1] << 8), buffer[2] | (buffer[3] << 8)
 
     def write_output(self, pin, value):
         """Write a value to an output pin."""
-        self.pins[pin].value = value
+        with self.bus_transaction():
+            self.pins[pin].value = value
+
+    def bus_transaction(self, priority=PRIORITY_INPUT):
+        """Hold the shared I2C bus, button reads go ahead of actuator writes and ADC sampling."""
+        return self.bus_arbiter.transaction(self.label, priority)
 
     def get_pin(self, pin):
         return self.mcp.get_pin(pin)
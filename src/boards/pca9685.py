@@ -1,23 +1,81 @@
+import threading
+from contextlib import contextmanager, ExitStack
 from adafruit_pca9685 import PCA9685 as Adafruit_PCA9685
 from loguru import logger
+from boards.bus_arbiter import BusArbiter, PRIORITY_ACTUATOR
+
+# PCA9685 registers: four bytes (ON_L, ON_H, OFF_L, OFF_H) per channel from LED0, and the
+# same four at ALL_LED for every channel at once. Writes auto-increment, as set up by the
+# Adafruit driver when it sets the frequency.
+_LED0_ON_L = 0x06
+_ALL_LED_ON_L = 0xFA
+_FULL = 0x1000  # Bit 4 of ON_H / OFF_H: fully on / fully off
+CHANNEL_COUNT = 16
+MAX_BURST_GAP = 1  # Rewrite up to this many clean channels to join two dirty runs into one burst
+
+# Default servo mapping: 0-180 degrees onto 1000-2000 µs pulses
+SERVO_MIN_PULSE = 1000
+SERVO_MAX_PULSE = 2000
+SERVO_ANGLE_RANGE = 180
+SERVO_FREQUENCY = 50
+
+def servo_pulse(angle):
+    """Pulse width in microseconds for an angle with the default servo mapping."""
+    return SERVO_MIN_PULSE + (SERVO_MAX_PULSE - SERVO_MIN_PULSE) * angle / SERVO_ANGLE_RANGE
+
+def pulse_to_duty(pulse_width, frequency):
+    """16-bit duty cycle of a pulse width in microseconds at a PWM frequency in Hz."""
+    return int((pulse_width * 65535) / (1000000 / frequency))
+
+def duty_to_registers(value):
+    """(ON, OFF) register values for a 16-bit duty cycle, as the Adafruit driver maps them."""
+    if not 0 <= value <= 0xFFFF:
+        raise ValueError(f"Out of range: value {value} not 0 <= value <= 65,535")
+    if value == 0xFFFF:
+        return (_FULL, 0)
+    if value < 0x0010:
+        return (0, _FULL)
+    return (0, value >> 4)
+
+@contextmanager
+def batch_writes(boards):
+    """Combine the PWM writes to all of these boards into one burst per board."""
+    with ExitStack() as stack:
+        for board in boards:
+            if hasattr(board, 'batch'):
+                stack.enter_context(board.batch())
+        yield
 
 class PCA9685:
-    def __init__(self, i2c, config, app_config):
+    def __init__(self, i2c, config, app_config, bus_arbiter=None):
+        self.bus_arbiter = bus_arbiter or BusArbiter(i2c)
         self.i2c_address = int(config['i2c_address'], 16)
         self.mode = config.get('purpose', 'LED Control')  # Default to LED Control if not specified
         self.label = config.get('label', 'Unknown')
+        # What the chip holds per channel as (ON, OFF); every channel is switched off at init
+        self.shadow = [None] * CHANNEL_COUNT
+        self.pending = {}
+        self.lock = threading.RLock()
+        self._batch_depth = 0
+        self.writes = 0
+        self.skipped_writes = 0
+        self.frequency = None  # Read back once from the chip whenever it is set
+        self.servo_duties = []
 
         try:
             # Initialize the Adafruit PCA9685 object
             self.pca = Adafruit_PCA9685(i2c, address=self.i2c_address)
             if self.mode == 'Servo Control':
-                frequency = config.get('frequency', 50)  # Default to 50Hz for servos
+                frequency = config.get('frequency', SERVO_FREQUENCY)  # Default to 50Hz for servos
                 self.set_frequency(frequency)
                 logger.info(f"🔮 Initialized PCA9685 {self.label} at {hex(self.i2c_address)} in Servo Control mode with frequency {frequency}Hz")
             else:
                 frequency = config.get('frequency', 1000)  # Default to 1000Hz for LEDs
                 self.set_frequency(frequency)
                 logger.info(f"🔮 Initialized PCA9685 {self.label} at {hex(self.i2c_address)} in LED Control mode with frequency {frequency}Hz")
+            # Channels may still hold values from a previous run; start from a known state
+            with self.lock:
+                self._write_all_off()
         except Exception as e:
             logger.error(f"💢 Failed to initialize PCA9685({self.label} at {hex(self.i2c_address)}: {str(e)}")
             raise e
@@ -29,26 +87,116 @@ class PCA9685:
 
     def set_frequency(self, frequency):
         """Set the PWM frequency in Hz."""
-        self.pca.frequency = frequency
+        with self.bus_transaction():
+            self.pca.frequency = frequency
+            # The prescaler rounds the frequency; keep the one the chip actually runs at
+            self.frequency = self.pca.frequency
+        self.servo_duties = [pulse_to_duty(servo_pulse(angle), self.frequency) for angle in range(SERVO_ANGLE_RANGE + 1)]
 
     def set_pwm(self, channel, on, off):
         """Set the PWM on/off values for a specific channel."""
-        self.pca.channels[channel].duty_cycle = off
+        self.set_pwm_value(channel, off)
 
     def set_pwm_value(self, channel, value):
-        """Set the PWM duty cycle as a 16-bit value (0-65535)."""
-        self.pca.channels[channel].duty_cycle = value
+        """Set the PWM duty cycle as a 16-bit value (0-65535).
+
+        Values the chip already holds are skipped. Inside batch() the write waits for the
+        burst at the end of the batch, otherwise it goes out right away.
+        """
+        registers = duty_to_registers(value)
+        with self.lock:
+            if registers == self.pending.get(channel, self.shadow[channel]):
+                self.skipped_writes += 1
+                return
+            if registers == self.shadow[channel]:
+                del self.pending[channel]  # Changed back before it was flushed
+            else:
+                self.pending[channel] = registers
+            if not self._batch_depth:
+                self.flush()
+
+    @contextmanager
+    def batch(self):
+        """Defer PWM writes until the outermost batch ends, then flush them together."""
+        with self.lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            # Keep the body's exception; a failed flush is only logged, its writes stay pending
+            try:
+                self._end_batch()
+            except Exception as e:
+                logger.error(f"💢 Failed to flush PWM writes to {self.label}: {e}")
+            raise
+        self._end_batch()
+
+    def _end_batch(self):
+        with self.lock:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self):
+        """Write all dirty channels, one auto-increment burst per run of neighbouring channels."""
+        with self.lock:
+            if not self.pending:
+                return
+            runs = []
+            for channel in sorted(self.pending):
+                if runs and self._can_join(runs[-1][-1], channel):
+                    runs[-1].extend(range(runs[-1][-1] + 1, channel + 1))
+                else:
+                    runs.append([channel])
+            with self.bus_transaction():
+                with self.pca.i2c_device as device:
+                    for run in runs:
+                        buffer = bytearray([_LED0_ON_L + 4 * run[0]])
+                        for channel in run:
+                            on, off = self.pending.get(channel, self.shadow[channel])
+                            buffer += bytes((on & 0xFF, on >> 8, off & 0xFF, off >> 8))
+                        device.write(buffer)
+            for channel, registers in self.pending.items():
+                self.shadow[channel] = registers
+            self.writes += len(runs)
+            self.pending = {}
+
+    def _can_join(self, last, channel):
+        gap = range(last + 1, channel)
+        return len(gap) <= MAX_BURST_GAP and all(self.shadow[index] is not None for index in gap)
+
+    def stop_channels(self, channels):
+        """Turn these channels fully off, with one ALL_LED write when no other channel is on."""
+        channels = set(channels)
+        off = (0, _FULL)
+        with self.lock:
+            others_off = all(self.pending.get(index, self.shadow[index]) == off
+                             for index in range(CHANNEL_COUNT) if index not in channels)
+            if not others_off:
+                with self.batch():
+                    for channel in channels:
+                        self.set_pwm_value(channel, 0)
+                return
+            self._write_all_off()
+
+    def _write_all_off(self):
+        with self.bus_transaction():
+            with self.pca.i2c_device as device:
+                device.write(bytes((_ALL_LED_ON_L, 0, 0, 0, _FULL >> 8)))
+        self.shadow = [(0, _FULL)] * CHANNEL_COUNT
+        self.pending = {}
+        self.writes += 1
+
+    def bus_transaction(self, priority=PRIORITY_ACTUATOR):
+        """Hold the shared I2C bus, actuator writes go ahead of ADC sampling."""
+        return self.bus_arbiter.transaction(self.label, priority)
 
     def set_servo_angle(self, channel, angle):
         """Set the servo angle for a specific channel."""
-        min_pulse = 1000  # Minimum pulse width (in microseconds)
-        max_pulse = 2000  # Maximum pulse width (in microseconds)
-        pulse_range = max_pulse - min_pulse
-        angle_range = 180  # Full range of servo angles (typically 0-180 degrees)
-
-        # Calculate duty cycle value for the given angle
-        pulse_width = min_pulse + (pulse_range * angle / angle_range)
-        duty_cycle_value = int((pulse_width * 65535) / (1000000 / self.pca.frequency))
+        if angle == int(angle) and 0 <= angle <= SERVO_ANGLE_RANGE:
+            duty_cycle_value = self.servo_duties[int(angle)]
+        else:
+            duty_cycle_value = pulse_to_duty(servo_pulse(angle), self.frequency)
 
         # Set the duty cycle for the specified channel
         self.set_pwm_value(channel, duty_cycle_value)
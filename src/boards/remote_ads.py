@@ -0,0 +1,120 @@
+import time
+import threading
+from loguru import logger
+from utils.sample_buffer import SampleBuffer, shared_buffer_name
+
+ATTACH_TIMEOUT = 10.0  # Seconds to wait for the acquisition process to publish a board
+ATTACH_RETRY_INTERVAL = 0.1
+
+class RemoteADSBoard:
+    """Read-only stand-in for an ADS board that is sampled by the acquisition process.
+
+    Maps the board's shared sample buffer and offers the same reading interface as ADSBase,
+    so voltage sensors and tools work unchanged without opening the I2C bus themselves.
+    There is no sampling thread on this side: poll() hands the samples that arrived since
+    the last call to the registered listeners.
+    """
+
+    def __init__(self, config, app_config=None, attach_timeout=ATTACH_TIMEOUT):
+        self.board_id = config['id']
+        self.label = config.get('label', 'Unknown')
+        self.location = config.get('location', 'Unknown')
+        self.purpose = config.get('purpose', 'Unknown')
+        settings = (app_config or {}).get(f"{config.get('type', '')}_SETTINGS", {})
+        self.rate_hold_off = settings.get('RATE_HOLD_OFF', 5.0)
+        self.lock = threading.Lock()
+        self._listeners = {}
+        self._delivered = {}
+        self.buffer = self._attach(attach_timeout)
+        self.max_readings = self.buffer.capacity
+        logger.info(f"🧠 Attached to shared samples of board {self.label} ({shared_buffer_name(self.board_id)})")
+
+    def _attach(self, timeout):
+        name = shared_buffer_name(self.board_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return SampleBuffer.attach(name)
+            except (FileNotFoundError, ValueError) as e:
+                if time.monotonic() >= deadline:
+                    logger.error(f"💢 No shared samples published for board {self.label} at '{name}': {e}")
+                    raise
+                time.sleep(ATTACH_RETRY_INTERVAL)
+
+    @property
+    def is_initialized(self):
+        return bool(self.buffer.get_field('initialized'))
+
+    @property
+    def data_rate(self):
+        return self.buffer.get_field('data_rate')
+
+    @property
+    def pins(self):
+        mask = self.buffer.get_field('pin_mask')
+        return [pin for pin in range(self.buffer.channels) if mask & (1 << pin)]
+
+    def poll(self):
+        """Push the samples written since the last poll to the listeners of each pin."""
+        with self.lock:
+            for pin in self._listeners:
+                self._deliver(pin)
+
+    def _deliver(self, pin):
+        sequence = self.buffer.sequence(pin)
+        new = sequence - self._delivered[pin]
+        if new <= 0:
+            return
+        # Anything older than a full buffer was overwritten before we got to it
+        values, _ = self.buffer.get_samples(pin, min(new, self.buffer.capacity))
+        for reading in values:
+            value = float(reading)
+            for listener in self._listeners[pin]:
+                listener.push(value)
+        self._delivered[pin] = sequence
+
+    def get_readings(self, pin):
+        return self.get_samples(pin, self.max_readings)[0].tolist()
+
+    # The writer is another process and never takes our lock, so every read is a checked copy
+    def get_window(self, pin, n):
+        return self.get_samples(pin, n)[0]
+
+    def get_timestamps(self, pin, n):
+        return self.get_samples(pin, n)[1]
+
+    def get_samples(self, pin, n):
+        with self.lock:
+            return self.buffer.get_samples(pin, n)
+
+    def get_window_matrix(self, pins, n):
+        with self.lock:
+            return self.buffer.get_window_matrix(pins, n)
+
+    def add_sample_listener(self, pin, listener):
+        """Feed listener.push(value) the buffered readings now and new readings on every poll()."""
+        with self.lock:
+            if pin in self._listeners:
+                self._deliver(pin)
+            for reading in self.buffer.get_samples(pin, self.max_readings)[0]:
+                listener.push(float(reading))
+            self._listeners.setdefault(pin, []).append(listener)
+            self._delivered[pin] = self.buffer.sequence(pin)
+
+    def get_sequence(self, pin):
+        return self.buffer.sequence(pin)
+
+    def get_sample_rates(self):
+        return {pin: float(self.buffer.rates[pin]) for pin in self.pins}
+
+    def escalate_data_rate(self):
+        """Ask the acquisition process to sample at its fast rate; ignored there unless adaptive rates are on."""
+        self.buffer.set_field('fast_until_ns', time.monotonic_ns() + int(self.rate_hold_off * 1e9))
+
+    def set_sampling_plan(self, plan):
+        # The acquisition process builds its own plans from the device config
+        pass
+
+    def cleanup(self):
+        logger.info(f"Detaching from shared samples of board {self.board_id}")
+        self.buffer.close()
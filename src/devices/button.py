@@ -10,6 +10,11 @@ class Button:
         self.pin_number = config['connection']['pin']
         self.board = board
         self.state = 'off'
+        # Optional actions for events beyond press, set with "long_press_action" or
+        # "double_press_action" in the button's preferences, e.g. "collector_off"
+        preferences = config.get('preferences', {})
+        self.actions = {event: preferences[f"{event}_action"] for event in ('long_press', 'double_press')
+                        if preferences.get(f"{event}_action")}
         self.is_pressed = False
         self.error_logged = False
 
@@ -31,7 +36,8 @@ class Button:
     def read_pin(self):
         try:
             if self.pin:
-                return not self.pin.value  # Invert because we're using pull-up resistors
+                with self.board.bus_transaction():
+                    return not self.pin.value  # Invert because we're using pull-up resistors
             else:
                 if not self.error_logged:
                     logger.error(f"💢 🔘 Pin not set up for button {self.label}")
@@ -43,6 +49,12 @@ class Button:
                 self.error_logged = True
             return None
 
+    def decode(self, port_value):
+        """Pressed state of this button from a whole-port read of its board."""
+        if port_value is None:
+            return None
+        return not (port_value >> self.pin_number) & 1  # Invert because we're using pull-up resistors
+
     def get_state(self):
         return self.state
 
@@ -1,9 +1,15 @@
+import bisect
 import json
 import logging
 import os
 import time
 from datetime import datetime
 from loguru import logger
+from boards.pca9685 import pulse_to_duty, servo_pulse, SERVO_ANGLE_RANGE, SERVO_FREQUENCY
+
+# Motion states: a moving gate's servo is driven until its settle time is over
+MOVING = 'moving'
+SETTLED = 'settled'
 
 class Gate:
     def __init__(self, name, gate_info, boards):
@@ -15,23 +21,58 @@ class Gate:
             raise ValueError(f"💢 Board with ID {board_id} not found")
 
         self.pin = gate_info['io_location']['pin']
-        self.min_angle = gate_info['min']
-        self.max_angle = gate_info['max']
-        self.state = gate_info['state']
-        self.previous_state = gate_info['state']
+        # gates.json calls the initial position "status"
+        self.state = gate_info.get('state', gate_info.get('status', 'closed'))
+        self.previous_state = self.state
+        self.motion = SETTLED
 
         if not hasattr(self.board, 'set_servo_angle'):
             logger.warning(f"🌟 Board {board_id} for gate {self.name} does not support servo control.")
+        self.configure(gate_info)
+
+    def configure(self, gate_info):
+        """Take the angles, settle time and calibration from gates.json and rebuild the PWM table."""
+        self.min_angle = gate_info['min']
+        self.max_angle = gate_info['max']
+        self.settle_time = gate_info.get('settle_time')  # Seconds; None uses GATE_SETTINGS.SETTLE_TIME
+        # Optional [[angle, pulse µs], ...] measured for this servo, interpolated between points
+        points = {}
+        for angle, pulse in gate_info.get('calibration', []):
+            if float(angle) in points:
+                logger.warning(f"⚠️ Gate {self.name} calibration lists angle {angle} twice, keeping the first point")
+                continue
+            points[float(angle)] = float(pulse)
+        self.calibration = sorted(points.items())
+        self.build_pwm_table()
+
+    def build_pwm_table(self):
+        """Duty cycle of every whole angle, so actuation is a lookup without float math or bus reads."""
+        self.frequency = getattr(self.board, 'frequency', None)
+        if self.frequency is None and hasattr(self.board, 'pca'):
+            self.frequency = self.board.pca.frequency
+        if not self.frequency:
+            # Without a table open()/close() would write None and the gate would never move
+            logger.warning(f"⚠️ Board for gate {self.name} reports no PWM frequency, assuming {SERVO_FREQUENCY}Hz")
+            self.frequency = SERVO_FREQUENCY
+        self.pwm_table = [pulse_to_duty(self.angle_to_pulse(angle), self.frequency) for angle in range(SERVO_ANGLE_RANGE + 1)]
+        self.open_pwm = self.angle_to_pwm(self.max_angle)
+        self.closed_pwm = self.angle_to_pwm(self.min_angle)
+
+    def angle_to_pulse(self, angle):
+        """Pulse width in microseconds, from the calibration curve if the gate has one."""
+        if len(self.calibration) < 2:
+            return servo_pulse(angle)
+        angles = [point[0] for point in self.calibration]
+        index = min(max(bisect.bisect_right(angles, angle), 1), len(angles) - 1)
+        (angle_low, pulse_low), (angle_high, pulse_high) = self.calibration[index - 1], self.calibration[index]
+        angle = min(max(angle, angles[0]), angles[-1])  # Never drive past the calibrated range
+        return pulse_low + (pulse_high - pulse_low) * (angle - angle_low) / (angle_high - angle_low)
 
     def angle_to_pwm(self, angle):
         """Convert a given angle (0-180) to a PWM value."""
-        min_pulse = 1000  # Minimum pulse width (in microseconds)
-        max_pulse = 2000  # Maximum pulse width (in microseconds)
-        pulse_range = max_pulse - min_pulse
-        angle_range = 180  # Full range of servo angles (typically 0-180 degrees)
-
-        pulse_width = min_pulse + (pulse_range * angle / angle_range)
-        return int((pulse_width * 65535) / (1000000 / self.board.pca.frequency))
+        if self.pwm_table and angle == int(angle) and 0 <= angle <= SERVO_ANGLE_RANGE:
+            return self.pwm_table[int(angle)]
+        return pulse_to_duty(self.angle_to_pulse(angle), self.frequency)
 
     def stop_servo(self):
         """Stop sending PWM signal to the servo, effectively turning it off."""
@@ -40,8 +81,7 @@ class Gate:
 
     def open(self):
         try:
-            pwm_value = self.angle_to_pwm(self.max_angle)
-            self.board.set_pwm_value(self.pin, pwm_value)
+            self.board.set_pwm_value(self.pin, self.open_pwm)
             self.update_state("open")
         except Exception as e:
             logger.error(f"💢 Failed to open gate {self.name}: {e}")
@@ -49,8 +89,7 @@ class Gate:
     def close(self):
         try:
             logger.debug(f'      🚥 ⛩️  Closing {self.name}')
-            pwm_value = self.angle_to_pwm(self.min_angle)
-            self.board.set_pwm_value(self.pin, pwm_value)
+            self.board.set_pwm_value(self.pin, self.closed_pwm)
             self.update_state("closed")
         except Exception as e:
             logger.error(f"💢 Failed to close gate {self.name}: {e}")
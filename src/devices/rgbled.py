@@ -36,9 +36,11 @@ class RGBLED:
         logger.debug(f"💡 RGB LED '{self.label}' turned off")
 
     def _set_color(self, colors):
-        for i, pin in enumerate(self.pins):
-            pwm_value = colors[i]  # No scaling needed, use the full 16-bit range
-            self.board.set_pwm(pin, 0, pwm_value)
+        # All three channels go out in one burst, and unchanged ones not at all
+        with self.board.batch():
+            for i, pin in enumerate(self.pins):
+                pwm_value = colors[i]  # No scaling needed, use the full 16-bit range
+                self.board.set_pwm(pin, 0, pwm_value)
 
     def update(self, button_states):
         for button_id in self.listen_to:
@@ -1,5 +1,8 @@
-import numpy as np
+import time
 from loguru import logger
+from utils.detectors import create_detector
+from utils.sensor_health import SensorHealthMonitor
+from utils.rolling_stats import RollingStats
 
 class VoltageSensor:
     def __init__(self, config, app_config):
@@ -8,15 +11,57 @@ class VoltageSensor:
         self.board_id = config['connection']['board']
         self.pin = config['connection']['pin']
         self.window_size = app_config['VOLTAGE_SENSOR_SETTINGS']['WINDOW_SIZE']
-        self.sd_threshold = config['preferences']['rolling_sd_threshold']
+        preferences = config['preferences']
+        detector_settings = preferences.get('detector', {})
+        # rolling_sd_threshold stays the threshold of the default rolling std detector
+        threshold = detector_settings.get('threshold', preferences.get('rolling_sd_threshold'))
+        detector_type = detector_settings.get('type', 'rolling_std')
+        if detector_type != 'rolling_std' and 'threshold' not in detector_settings and 'on_threshold' not in preferences:
+            logger.warning(f"⚠️ {self.label} uses the {detector_type} detector without a threshold; falling back to "
+                           f"rolling_sd_threshold ({threshold}), which is in std units and likely wrong for it")
+        # Switch on above threshold, and only back off once below off_threshold, so a
+        # value hovering around one threshold cannot make the state flap
+        self.threshold = preferences.get('on_threshold', threshold)
+        self.off_threshold = preferences.get('off_threshold', self.threshold)
+        if self.threshold is not None and self.off_threshold > self.threshold:
+            # Off above on would switch off while still above the on threshold, then straight back on
+            logger.error(f"❌ {self.label} off_threshold {self.off_threshold} is above on_threshold "
+                         f"{self.threshold}, using {self.threshold}")
+            self.off_threshold = self.threshold
+        # Minimum seconds to stay in a state before leaving it again
+        self.min_on_time = preferences.get('min_on_time', 0.0)
+        self.min_off_time = preferences.get('min_off_time', 0.0)
         self.max_errors = app_config['VOLTAGE_SENSOR_SETTINGS']['MAX_ERRORS']
+        self.escalation_ratio = app_config['VOLTAGE_SENSOR_SETTINGS'].get('ESCALATION_RATIO', 0.7)
         
-        self.readings = []
+        self.detector = create_detector(detector_settings, self.window_size)
+        health_settings = app_config.get('SENSOR_HEALTH_SETTINGS', {})
+        self.health_settings = health_settings if health_settings.get('ENABLED', False) else None
+        self.health = None
         self.state = 'off'
         self.error_count = 0
+        self.last_sequence = None
+        self.last_value = None
+        self.state_since = None  # No dwell before the first transition after startup
+        self.raw_state = 'off'
+        self.transitions = 0
+        self.raw_transitions = 0
 
-    def set_board(self, board):
+    def set_board(self, board, streaming=True):
         self.board = board
+        if streaming:
+            # The board pushes every new reading into the detector from its sampling thread
+            board.add_sample_listener(self.pin, self.detector)
+        if self.health_settings is not None:
+            rail_voltage = min(getattr(board, 'full_scale', 4.096), getattr(board, 'supply_voltage', 3.3))
+            # Shares the rolling std detector's window stats; other detectors and batch
+            # evaluated sensors have none streaming, so those get a RollingStats of their own
+            stats = getattr(self.detector, 'stats', None) if streaming else None
+            if stats is None:
+                stats = RollingStats(self.detector.window_size)
+                board.add_sample_listener(self.pin, stats)
+            self.health = SensorHealthMonitor(stats, self.health_settings, rail_voltage)
+        logger.debug(f"🔍 {self.label} uses the {self.detector.name} detector over {self.detector.window_size} samples")
 
     def update(self):
         if not hasattr(self, 'board') or self.board is None:
@@ -24,7 +69,10 @@ class VoltageSensor:
             return False
 
         try:
-            self.readings = self.board.get_readings(self.pin)[-self.window_size:]
+            sequence = self.board.get_sequence(self.pin)
+            if sequence == self.last_sequence:
+                return False  # No new samples since the last check
+            self.last_sequence = sequence
         except Exception as e:
             logger.error(f"❌ Error reading from board for Voltage Sensor {self.id}: {e}")
             self.error_count += 1
@@ -33,31 +81,107 @@ class VoltageSensor:
             return False
 
         self.error_count = 0
+        self.tune_detector()
         return self.check_state()
 
+    def tune_detector(self):
+        """Let frequency-aware detectors follow the pin's actual sample rate."""
+        if hasattr(self.detector, 'set_sample_rate'):
+            sample_rate = self.board.get_sample_rates().get(self.pin)
+            with self.board.lock:
+                self.detector.set_sample_rate(sample_rate)
+
     def check_state(self):
-        if len(self.readings) < self.window_size:
+        if not self.detector.is_ready:
             return False
+        return self.apply_value(self.detector.value)
+
+    def apply_value(self, current_value):
+        """Set the state from a detector value, computed here or by a batch detection group."""
+        self.last_value = current_value
 
-        current_std = np.std(self.readings)
-        new_state = 'on' if current_std > self.sd_threshold else 'off'
+        # What a single threshold would have done, to count the flaps hysteresis avoids
+        raw_state = 'on' if current_value > self.threshold else 'off'
+        if raw_state != self.raw_state:
+            self.raw_state = raw_state
+            self.raw_transitions += 1
+
+        if self.state == 'on':
+            new_state = 'off' if current_value <= self.off_threshold else 'on'
+            dwell = self.min_on_time
+        else:
+            new_state = 'on' if current_value > self.threshold else 'off'
+            dwell = self.min_off_time
         
         if new_state != self.state:
+            now = time.monotonic()
+            if self.state_since is not None and now - self.state_since < dwell:
+                return False  # Not in this state long enough to leave it yet
             self.state = new_state
+            self.state_since = now
+            self.transitions += 1
             logger.info(f"⚡ {self.label} state changed to: {self.state.upper()}")
-            logger.debug(f"⚡ current std: {current_std:.6f}V, threshold: {self.sd_threshold:.6f}V")
+            logger.debug(f"⚡ current {self.detector.name}: {current_value:.6f}, "
+                         f"on/off thresholds: {self.threshold:.6f}/{self.off_threshold:.6f}")
             return True
 
         return False
 
+    def set_threshold(self, threshold):
+        """Move the on threshold, keeping the off threshold at the same ratio below it."""
+        ratio = self.off_threshold / self.threshold if self.threshold else 1.0
+        self.threshold = threshold
+        self.off_threshold = threshold * ratio
+
+    def is_near_threshold(self):
+        """True while the detector value is within escalation range of the thresholds, from either side."""
+        if self.last_value is None:
+            return False
+        return self.off_threshold * self.escalation_ratio <= self.last_value <= self.threshold / self.escalation_ratio
+
+    def get_transition_counts(self):
+        """State changes made, and those a single threshold without dwell times would have made."""
+        return {
+            'transitions': self.transitions,
+            'raw_transitions': self.raw_transitions,
+            'suppressed': max(self.raw_transitions - self.transitions, 0),
+        }
+
     def get_state(self):
         return self.state
 
+    def check_health(self):
+        """Update the health state of the input; returns it, or None when monitoring is off."""
+        if self.health is None:
+            return None
+        read_errors = self.board.get_read_errors().get(self.pin) if hasattr(self.board, 'get_read_errors') else None
+        previous = self.health.state
+        with self.board.lock:
+            state = self.health.check(self.board.get_sequence(self.pin), read_errors)
+        if state != previous:
+            if state == 'ok':
+                logger.info(f"💚 {self.label} input is healthy")
+            else:
+                logger.warning(f"⚠️ {self.label} input health: {state} ({', '.join(self.health.issues)})")
+        return state
+
     def cleanup(self):
         logger.debug(f"🧹 Cleaning up Voltage Sensor {self.id}")
 
     def reset(self):
-        self.readings = []
+        if getattr(self, 'board', None) is not None:
+            with self.board.lock:
+                self.detector.reset()
+                if self.health is not None:
+                    if self.health.stats is not getattr(self.detector, 'stats', None):
+                        self.health.stats.reset()
+                    self.health.reset()
+        else:
+            self.detector.reset()
         self.state = 'off'
+        self.raw_state = 'off'
+        self.state_since = None
         self.error_count = 0
+        self.last_sequence = None
+        self.last_value = None
         logger.info(f"🔄 Voltage Sensor {self.id} reset")
\ No newline at end of file
@@ -4,6 +4,7 @@ import board
 import time
 from utils.config_loader import ConfigLoader
 from managers.board_manager import BoardManager
+from managers.acquisition_process import AcquisitionProcess
 from managers.device_manager import DeviceManager
 from managers.style_manager import StyleManager
 from gui.main_window import MainWindow
@@ -36,21 +37,26 @@ def initialize_gui(board_manager, device_manager):
         return app, main_window
     return None, None
 
-def initialize_managers(i2c):
+def load_boards_config():
     boards_config = config_loader.get_boards()
-    devices_config = config_loader.get_devices()
-    gates_config = config_loader.get_gates()
-
     if isinstance(boards_config, list):
         boards_config = {board['id']: board for board in boards_config}
+    return boards_config
 
-    board_manager = BoardManager(i2c)
+def initialize_managers(i2c):
+    boards_config = load_boards_config()
+    devices_config = config_loader.get_devices()
+    gates_config = config_loader.get_gates()
+
+    board_manager = BoardManager(i2c, app_config)
     boards = board_manager.initialize_all_boards(boards_config, app_config)
 
     style_manager = StyleManager()
     rgbled_styles = style_manager.get_styles()
 
-    device_manager = DeviceManager(devices_config, gates_config, boards, rgbled_styles, app_config)
+    device_manager = DeviceManager(devices_config, gates_config, boards, rgbled_styles, app_config,
+                                   duct_topology=config_loader.get_duct_topology(),
+                                   config_loader=config_loader)
     logger.info("🔧 Managers initialized: BoardManager, StyleManager, DeviceManager")
     
     return board_manager, device_manager
@@ -58,8 +64,14 @@ def initialize_managers(i2c):
 def main():
     device_manager = None
     board_manager = None
+    acquisition_process = None
     try:
         logger.info("🚀 Starting the shop management application...")
+
+        acquisition_process = AcquisitionProcess(load_boards_config(), config_loader.get_devices(), app_config)
+        if acquisition_process.enabled:
+            # Started before this process opens the bus or any GUI so the child inherits neither
+            acquisition_process.start()
         
         i2c = busio.I2C(board.SCL, board.SDA)
         logger.info("🔌 I2C interface initialized")
@@ -78,7 +90,7 @@ def main():
             while True:
                 try:
                     device_manager.update()
-                    time.sleep(0.1)  # Adjust as needed to control loop speed
+                    device_manager.wait_for_events()
                 except Exception as e:
                     logger.error(f"💥 An error occurred during device update: {str(e)}")
                     break  # Exit the loop on error
@@ -92,6 +104,8 @@ def main():
             device_manager.cleanup()
         if board_manager:
             board_manager.cleanup()
+        if acquisition_process:
+            acquisition_process.stop()
         logger.info("🧹 All threads and resources cleaned up gracefully.")
 
 if __name__ == "__main__":
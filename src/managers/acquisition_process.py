@@ -0,0 +1,94 @@
+import multiprocessing
+from loguru import logger
+from boards.ads_base import ADS1115, ADS1015
+from boards.bus_arbiter import BusArbiter
+from managers.voltage_sensor_manager import VoltageSensorManager
+
+ADS_BOARD_CLASSES = {'ADS1115': ADS1115, 'ADS1015': ADS1015}
+
+def is_ads_board(board_config):
+    return board_config.get('type') in ADS_BOARD_CLASSES
+
+def run_acquisition(boards_config, devices_config, app_config, stop_event):
+    """Entry point of the acquisition process: sample every enabled ADS board into shared memory."""
+    import board
+    import busio
+
+    use_boards = app_config.get('USE_BOARDS', {})
+    i2c = busio.I2C(board.SCL, board.SDA)
+    bus_arbiter = BusArbiter(i2c, app_config.get('BUS_ARBITER_SETTINGS'))
+    boards = {}
+    for board_id, board_config in boards_config.items():
+        board_type = board_config.get('type')
+        if not is_ads_board(board_config) or not use_boards.get(f"USE_{board_type}", False):
+            continue
+        try:
+            boards[board_id] = ADS_BOARD_CLASSES[board_type](i2c, board_config, app_config, bus_arbiter, shared=True)
+        except Exception as e:
+            logger.error(f"💥 Acquisition process failed to initialize board '{board_config.get('label')}': {str(e)}")
+
+    plans = VoltageSensorManager.build_sampling_plans(devices_config)
+    for board_id, ads_board in boards.items():
+        ads_board.set_sampling_plan(plans.get(board_id, {}))
+
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass  # Ctrl+C reaches the whole process group; the parent asks us to stop properly
+    finally:
+        bus_arbiter.log_usage()
+        for board_id, ads_board in boards.items():
+            try:
+                ads_board.cleanup()
+            except Exception as e:
+                logger.error(f"💥 Error cleaning up board {board_id} in the acquisition process: {str(e)}")
+        logger.info("✅ Acquisition process stopped")
+
+class AcquisitionProcess:
+    """Runs ADS sampling in its own process, away from the GUI and the device loop.
+
+    The child process owns the ADS boards and publishes their samples in shared memory
+    ring buffers (one per board, see utils.sample_buffer.shared_buffer_name). The main app
+    and the tools map them with boards.remote_ads.RemoteADSBoard instead of opening the
+    I2C bus. MCP23017 and PCA9685 boards stay in the main process; the kernel serialises
+    transfers between the two processes, but the bus arbiter's priorities only apply
+    within each one.
+    """
+
+    def __init__(self, boards_config, devices_config, app_config):
+        self.boards_config = boards_config
+        self.devices_config = devices_config
+        self.app_config = app_config
+        self.settings = app_config.get('ACQUISITION_PROCESS', {})
+        self.stop_timeout = self.settings.get('STOP_TIMEOUT', 10.0)
+        self.stop_event = multiprocessing.Event()
+        self.process = None
+
+    @property
+    def enabled(self):
+        return self.settings.get('ENABLED', False)
+
+    def start(self):
+        self.process = multiprocessing.Process(
+            target=run_acquisition,
+            args=(self.boards_config, self.devices_config, self.app_config, self.stop_event),
+            name='rudi-acquisition',
+            daemon=True,
+        )
+        self.process.start()
+        logger.info(f"🚀 Acquisition process started (pid {self.process.pid})")
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self):
+        if self.process is None:
+            return
+        logger.info("🛑 Stopping acquisition process")
+        self.stop_event.set()
+        self.process.join(timeout=self.stop_timeout)
+        if self.process.is_alive():
+            logger.warning("⚠️ Acquisition process did not stop within the timeout period, terminating it")
+            self.process.terminate()
+            self.process.join()
+        self.process = None
@@ -1,13 +1,19 @@
 from boards.mcp23017 import MCP23017
 from boards.pca9685 import PCA9685
 from boards.ads_base import ADS1115, ADS1015
+from boards.bus_arbiter import BusArbiter
+from boards.remote_ads import RemoteADSBoard
 from loguru import logger
 import smbus2
 
 class BoardManager:
-    def __init__(self, i2c):
+    def __init__(self, i2c, app_config=None):
         self.i2c = i2c
         self.boards = {}
+        # Every board shares one arbiter so button reads and actuator writes are not starved by ADC sampling
+        self.bus_arbiter = BusArbiter(i2c, (app_config or {}).get('BUS_ARBITER_SETTINGS'))
+        # With the acquisition process running, ADS boards are only mapped from shared memory here
+        self.remote_ads = (app_config or {}).get('ACQUISITION_PROCESS', {}).get('ENABLED', False)
         logger.info("🔧 BoardManager initialized with I2C interface")
 
     def is_device_present(self, address):
@@ -29,14 +35,16 @@ class BoardManager:
             return None
 
         try:
-            if board_type == "MCP23017" and use_boards.get("USE_MCP23017", False):
-                board = MCP23017(self.i2c, board_config, app_config)
+            if board_type in ("ADS1115", "ADS1015") and self.remote_ads and use_boards.get(f"USE_{board_type}", False):
+                board = RemoteADSBoard(board_config, app_config)
+            elif board_type == "MCP23017" and use_boards.get("USE_MCP23017", False):
+                board = MCP23017(self.i2c, board_config, app_config, self.bus_arbiter)
             elif board_type == "PCA9685" and use_boards.get("USE_PCA9685", False):
-                board = PCA9685(self.i2c, board_config, app_config)
+                board = PCA9685(self.i2c, board_config, app_config, self.bus_arbiter)
             elif board_type == "ADS1115" and use_boards.get("USE_ADS1115", False):
-                board = ADS1115(self.i2c, board_config, app_config)
+                board = ADS1115(self.i2c, board_config, app_config, self.bus_arbiter)
             elif board_type == "ADS1015" and use_boards.get("USE_ADS1015", False):
-                board = ADS1015(self.i2c, board_config, app_config)
+                board = ADS1015(self.i2c, board_config, app_config, self.bus_arbiter)
             else:
                 logger.error(f"❌ Unknown or disabled board type '{board_type}' for board '{label}'")
                 return None
@@ -64,8 +72,12 @@ class BoardManager:
     def get_boards(self):
         return self.boards
 
+    def get_bus_usage(self):
+        return self.bus_arbiter.get_usage()
+
     def cleanup(self):
         logger.info("🧹 Cleaning up BoardManager")
+        self.bus_arbiter.log_usage()
         for board_id, board in self.boards.items():
             if hasattr(board, 'cleanup'):
                 try:
@@ -2,14 +2,33 @@ import threading
 import time
 from loguru import logger
 from devices.button import Button
+from utils.debouncer import ButtonDebouncer, PRESS
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
 
 class ButtonManager:
-    def __init__(self, device_config, boards):
+    def __init__(self, device_config, boards, app_config=None, gpio=None, event_queue=None):
         self.buttons = {}
         self.boards = boards
+        # With a queue, events are handled by the control loop instead of the polling thread
+        self.event_queue = event_queue
+        self.debouncers = {}
+        self.event_listeners = []
         self.stop_event = threading.Event()
-        self.debounce_time = 0.05  # 50ms debounce time
         self.polling_thread = None
+
+        settings = (app_config or {}).get('BUTTON_SETTINGS', {})
+        self.input_mode = settings.get('INPUT_MODE', 'poll')
+        self.poll_interval = settings.get('POLL_INTERVAL', 0.01)
+        self.safety_poll_interval = settings.get('SAFETY_POLL_INTERVAL', 1.0)
+        # Keep polling fast for a while after an interrupt to see releases and bounces settle
+        self.active_time = settings.get('ACTIVE_TIME', 0.5)
+        self.gpio = gpio or GPIO
+        self.wake_event = threading.Event()
+        self.interrupt_boards = []
         self.initialize_buttons(device_config)
 
 
@@ -21,6 +40,8 @@ class ButtonManager:
                     try:
                         button = Button(device, board)
                         self.buttons[device['id']] = button
+                        timing = device.get('preferences', {}).get('button_timing')
+                        self.debouncers[device['id']] = ButtonDebouncer(timing, self.poll_interval)
                     except Exception as e:
                         logger.error(f"💢 Failed to initialize button {device['label']}: {e}")
                 else:
@@ -38,38 +59,146 @@ class ButtonManager:
     def stop_polling(self):
         if self.polling_thread and self.polling_thread.is_alive():
             self.stop_event.set()
+            self.wake_event.set()
             self.polling_thread.join()
             logger.info("🛑 Button polling stopped")
         else:
             logger.warning("No active button polling thread to stop")
 
+    def _group_buttons_by_board(self):
+        """Buttons on boards that can read a whole port, grouped per board, and all other buttons."""
+        port_boards = {}
+        single_buttons = {}
+        for button_id, button in self.buttons.items():
+            if hasattr(button.board, 'read_port'):
+                port_boards.setdefault(id(button.board), (button.board, {}))[1][button_id] = button
+            else:
+                single_buttons[button_id] = button
+        return list(port_boards.values()), single_buttons
+
+    def _setup_interrupts(self, port_boards):
+        """Arm INTA/INTB on every button board with an interrupt_pin and watch it for falling edges."""
+        if self.input_mode != 'interrupt':
+            return
+        if self.gpio is None:
+            logger.warning("⚠️ RPi.GPIO not available, buttons fall back to polling")
+            return
+        for board, buttons in port_boards:
+            if getattr(board, 'interrupt_pin', None) is None:
+                logger.warning(f"⚠️ {board.label} has no interrupt_pin, its buttons are polled")
+                continue
+            pin_mask = 0
+            for button in buttons.values():
+                pin_mask |= 1 << button.pin_number
+            try:
+                board.enable_interrupts(pin_mask)
+                self.gpio.setmode(self.gpio.BCM)
+                self.gpio.setup(board.interrupt_pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+                self.gpio.add_event_detect(board.interrupt_pin, self.gpio.FALLING, callback=self._on_interrupt)
+                self.interrupt_boards.append(board)
+            except Exception as e:
+                logger.error(f"💢 Failed to set up button interrupts on {board.label}: {e}, polling it instead")
+
+    def _release_interrupts(self):
+        for board in self.interrupt_boards:
+            try:
+                self.gpio.remove_event_detect(board.interrupt_pin)
+                self.gpio.cleanup(board.interrupt_pin)
+                board.disable_interrupts()
+            except Exception as e:
+                logger.error(f"💢 Failed to release button interrupts on {board.label}: {e}")
+        self.interrupt_boards = []
+
+    def _on_interrupt(self, channel):
+        self.wake_event.set()
+
+    def _read_button_states(self, port_boards, single_buttons, interrupted=False):
+        """Return (latched, current) pressed states of the buttons.
+
+        Each board costs one I2C transaction, however many buttons it has. After an
+        interrupt, boards that raise one also report the port as latched when the
+        interrupt fired, so a press that is already over is not missed.
+        """
+        captured = {}
+        states = {}
+        for board, buttons in port_boards:
+            try:
+                if interrupted and board in self.interrupt_boards:
+                    capture_value, port_value = board.read_interrupt_capture()
+                    for button_id, button in buttons.items():
+                        captured[button_id] = button.decode(capture_value)
+                else:
+                    port_value = board.read_port()
+            except Exception as e:
+                logger.error(f"Error reading buttons on {board.label}: {e}")
+                port_value = None
+            for button_id, button in buttons.items():
+                states[button_id] = button.decode(port_value)
+        for button_id, button in single_buttons.items():
+            states[button_id] = button.read_pin()
+        return captured, states
+
     def _poll_buttons(self):
-        last_press_time = {button_id: 0 for button_id in self.buttons}
-        button_states = {button_id: False for button_id in self.buttons}
+        port_boards, single_buttons = self._group_buttons_by_board()
+        self._setup_interrupts(port_boards)
+        # Only when every button sits behind an interrupt can the loop sleep between edges
+        interrupt_only = not single_buttons and len(self.interrupt_boards) == len(port_boards)
+        last_activity = 0
+        interrupted = False
 
         while not self.stop_event.is_set():
-            for button_id, button in self.buttons.items():
-                try:
-                    current_state = button.read_pin()
-                    if current_state is None:
-                        continue  # Skip this iteration if read_pin returns None
-
-                    if current_state != button_states[button_id]:
-                        current_time = time.time()
-                        if current_time - last_press_time[button_id] > self.debounce_time:
-                            if current_state:  # Button is pressed
-                                self._toggle_button_state(button)
-                            button_states[button_id] = current_state
-                            last_press_time[button_id] = current_time
-                except Exception as e:
-                    logger.error(f"Error polling button {button.label}: {e}")
-
-            time.sleep(0.01)  # Poll every 10ms
+            now = time.monotonic()
+            captured, current_states = self._read_button_states(port_boards, single_buttons, interrupted)
+            for button_id, captured_state in captured.items():
+                # The edge that raised the interrupt is a confirmed transition, not one raw sample
+                if captured_state != self.debouncers[button_id].pressed:
+                    self._dispatch(button_id, self.debouncers[button_id].latch(captured_state, now))
+            for button_id, current_state in current_states.items():
+                if current_state is None:
+                    continue  # Skip buttons whose read failed
+                self._dispatch(button_id, self.debouncers[button_id].update(current_state, now))
+            for button_id, debouncer in self.debouncers.items():
+                if debouncer.busy:
+                    last_activity = now
+                    self._dispatch(button_id, debouncer.tick(now))
+
+            if interrupt_only and now - last_activity > self.active_time:
+                timeout = self.safety_poll_interval  # Idle: wait for an edge, with a slow safety poll
+            else:
+                timeout = self.poll_interval
+            interrupted = self.wake_event.wait(timeout)
+            self.wake_event.clear()
+            if interrupted:
+                last_activity = time.monotonic()
+
+        self._release_interrupts()
+
+    def add_event_listener(self, callback):
+        """Call callback(button, event) for every press, release, long_press and double_press."""
+        self.event_listeners.append(callback)
+
+    def _dispatch(self, button_id, events):
+        for event in events:
+            if self.event_queue is not None:
+                self.event_queue.put('button', button_id, event)
+            else:
+                self.apply_event(button_id, event)
+
+    def apply_event(self, button_id, event):
+        """Toggle the button on press and notify the event listeners."""
+        button = self.buttons[button_id]
+        logger.debug(f"🔘 Button {button.label}: {event}")
+        if event == PRESS:
+            self._toggle_button_state(button)
+        for callback in self.event_listeners:
+            try:
+                callback(button, event)
+            except Exception as e:
+                logger.error(f"Error handling {event} of button {button.label}: {e}")
 
     def _toggle_button_state(self, button):
         button.state = 'on' if button.state == 'off' else 'off'
         logger.info(f"Button {button.label} toggled to {button.state}")
-        # Here you can add any additional logic or callbacks when a button state changes
 
     def get_button_state(self, button_id):
         button = self.buttons.get(button_id)
@@ -7,9 +7,14 @@ from .button_manager import ButtonManager
 from .rgbled_manager import RGBLEDManager
 from .dust_collector_manager import DustCollectorManager
 from .gui_button_manager import GuiButtonManager
+from utils.event_queue import EventQueue
+from boards.pca9685 import batch_writes
+from utils.routing import RoutingTable
+from utils.duct_topology import DuctTopology
 
 class DeviceManager:
-    def __init__(self, device_config, gates_config, boards, rgbled_styles, app_config):
+    def __init__(self, device_config, gates_config, boards, rgbled_styles, app_config, duct_topology=None,
+                 config_loader=None):
         self.use_devices = app_config.get('USE_DEVICES', {})
         self.device_config = device_config
         self.gates_config = gates_config
@@ -17,6 +22,14 @@ class DeviceManager:
         self.rgbled_styles = rgbled_styles
         self.app_config = app_config
         self.stop_event = threading.Event()
+        # Button presses, sensor transitions and GUI toggles arrive here and wake the control loop
+        self.event_queue = EventQueue()
+        self.sensor_interval = app_config.get('CONTROL_LOOP_SETTINGS', {}).get('SENSOR_INTERVAL', 0.1)
+        self.next_sensor_update = 0.0
+        # Polled from update() so the GUI and headless loops both pick up gates.json edits
+        self.config_loader = config_loader
+        self.config_check_interval = app_config.get('CONTROL_LOOP_SETTINGS', {}).get('CONFIG_CHECK_INTERVAL', 1.0)
+        self.next_config_check = time.monotonic() + self.config_check_interval
         logger.info("🔧 Initializing DeviceManager")
         self.gate_manager = None
         self.voltage_sensor_manager = None
@@ -25,17 +38,23 @@ class DeviceManager:
         self.dust_collector_manager = None
         self.previous_voltage_states = {}
         self.previous_button_states = {}
+        self.previous_gui_button_states = {}
         self.previous_led_states = {}
+        self.routing = RoutingTable()
+        self.duct_topology = DuctTopology(duct_topology)
         self.initialize_devices()
+        self.compile_routing()
 
     def initialize_devices(self):
         try:
             if self.use_devices.get("USE_GATES", False):
-                self.gate_manager = GateManager(self.boards, self.gates_config)
+                self.gate_manager = GateManager(self.boards, self.gates_config, self.app_config)
                 logger.info("⛩️⛩️⛩️  GateManager initialized ⛩️⛩️⛩️")
 
             if self.use_devices.get("USE_BUTTONS", False):
-                self.button_manager = ButtonManager(self.device_config, self.boards)
+                self.button_manager = ButtonManager(self.device_config, self.boards, self.app_config,
+                                                   event_queue=self.event_queue)
+                self.button_manager.add_event_listener(self.handle_button_event)
                 self.button_manager.start_polling()
                 logger.info("🔘🔘🔘 ButtonManager initialized and polling started 🔘🔘🔘")
 
@@ -48,7 +67,8 @@ class DeviceManager:
                 logger.info("💨💨💨 DustCollectorManager initialized 💨💨💨")
 
             if self.use_devices.get("USE_VOLTAGE_SENSORS", False):
-                self.voltage_sensor_manager = VoltageSensorManager(self.device_config, self.boards, self.app_config)
+                self.voltage_sensor_manager = VoltageSensorManager(self.device_config, self.boards, self.app_config,
+                                                                  event_queue=self.event_queue)
                 logger.info("⚡⚡⚡ VoltageSensorManager initialized ⚡⚡⚡")
 
             if self.use_devices.get("USE_GUI_BUTTONS", False):
@@ -60,36 +80,49 @@ class DeviceManager:
             raise e
 
     def update(self):
+        """Evaluate the voltage sensors when due, then act on every queued input event.
+
+        PWM writes of one pass are flushed together at the end, one burst per board.
+        """
+        with batch_writes(self.boards.values()):
+            return self._update()
+
+    def _update(self):
         try:
-            state_changed = False
+            if self.gate_manager:
+                self.gate_manager.update()
+            now = time.monotonic()
+            if self.config_loader and now >= self.next_config_check:
+                self.next_config_check = now + self.config_check_interval
+                if self.config_loader.reload_gates_if_changed():
+                    self.reload_gates_config(self.config_loader.get_gates())
+            sensors_evaluated = False
+            if now >= self.next_sensor_update:
+                self.next_sensor_update = now + self.sensor_interval
+                if self.use_devices.get("USE_VOLTAGE_SENSORS", False) and self.voltage_sensor_manager:
+                    self.voltage_sensor_manager.update()  # Queues an event for every sensor that changed state
+                    sensors_evaluated = True
+
+            events = self.event_queue.drain()
+            if not events and not sensors_evaluated:
+                return False
+            for event in events:
+                self.handle_event(event)
+
             current_voltage_states = {}
             current_button_states = {}
             current_gui_button_states = {}
-
-            if self.use_devices.get("USE_VOLTAGE_SENSORS", False) and self.voltage_sensor_manager:
-                voltage_state_changed = self.voltage_sensor_manager.update()
+            if self.voltage_sensor_manager:
                 current_voltage_states = {sensor_id: sensor.get_state() for sensor_id, sensor in self.voltage_sensor_manager.voltage_sensors.items()}
-                if voltage_state_changed:
-                    changed_sensors = [f"{k}: {v}" for k, v in current_voltage_states.items() if self.previous_voltage_states.get(k) != v]
-                    if changed_sensors:
-                        state_changed = True
-                        logger.info(f"⚡ VoltageSensor states changed: {', '.join(changed_sensors)}")
-
-            if self.use_devices.get("USE_BUTTONS", False) and self.button_manager:
-                self.button_manager.update_buttons()
-                current_button_states = {button_id: button.get_state() for button_id, button in self.button_manager.buttons.items()}
-                if current_button_states != self.previous_button_states:
-                    state_changed = True
-                    changed_buttons = [f"{k}: {v}" for k, v in current_button_states.items() if self.previous_button_states.get(k) != v]
-                    logger.info(f"🔘 Button state changed: {', '.join(changed_buttons)}")
-
-            if self.use_devices.get("USE_GUI_BUTTONS", False) and self.gui_button_manager:
-                self.gui_button_manager.update_buttons()
-                current_gui_button_states = {button_id: button.get_state() for button_id, button in self.gui_button_manager.gui_buttons.items()}
-                if current_gui_button_states != self.previous_gui_button_states:
-                    state_changed = True
-                    changed_gui_buttons = [f"{k}: {v}" for k, v in current_gui_button_states.items() if self.previous_gui_button_states.get(k) != v]
-                    logger.info(f"🖱️ GUI Button state changed: {', '.join(changed_gui_buttons)}")
+            if self.button_manager:
+                current_button_states = self.button_manager.get_all_button_states()
+            if getattr(self, 'gui_button_manager', None):
+                current_gui_button_states = self.gui_button_manager.get_all_button_states()
+            # Also diffed on sensor ticks without events: a reset (after read errors or from
+            # reset_sensor) turns a sensor off without queuing a transition
+            state_changed = (current_voltage_states != self.previous_voltage_states
+                             or current_button_states != self.previous_button_states
+                             or current_gui_button_states != self.previous_gui_button_states)
 
             if self.use_devices.get("USE_DUST_COLLECTORS", False) and self.dust_collector_manager:
                 all_button_states = {**current_button_states, **current_gui_button_states}
@@ -105,11 +138,48 @@ class DeviceManager:
             self.previous_voltage_states = current_voltage_states
             self.previous_button_states = current_button_states
             self.previous_gui_button_states = current_gui_button_states
+            return state_changed
 
         except Exception as e:
             logger.error(f"💢 Error during device update: {str(e)}")
             raise e
 
+    def handle_event(self, event):
+        latency_ms = (time.monotonic() - event.timestamp) * 1000
+        if event.source == 'button' and self.button_manager:
+            self.button_manager.apply_event(event.device_id, event.kind)
+        elif event.source == 'voltage_sensor':
+            logger.info(f"⚡ VoltageSensor {event.device_id} turned {event.kind}")
+        elif event.source == 'gui_button':
+            logger.info(f"🖱️ GUI Button {event.device_id} turned {'on' if event.value else 'off'}")
+        logger.debug(f"📨 {event.source} {event.device_id} {event.kind} handled after {latency_ms:.1f} ms")
+
+    def wait_for_events(self):
+        """Sleep until an input event arrives, the next voltage sensor evaluation or a gate settles."""
+        deadline = self.next_sensor_update
+        if self.gate_manager:
+            gate_deadline = self.gate_manager.next_deadline()
+            if gate_deadline is not None:
+                deadline = min(deadline, gate_deadline)
+        timeout = deadline - time.monotonic()
+        if timeout > 0:
+            self.event_queue.wait(timeout)
+
+    def handle_button_event(self, button, event):
+        """Run the action a button has configured for this event, if any."""
+        action = button.actions.get(event)
+        if not action:
+            return
+        logger.info(f"🔘 {button.label} {event.replace('_', ' ')}: {action}")
+        if action == 'collector_off':
+            # Drop every button's claim so the collector is not switched straight back on
+            for other in self.button_manager.buttons.values():
+                other.state = 'off'
+            if self.dust_collector_manager:
+                self.dust_collector_manager.force_off()
+        else:
+            logger.warning(f"⚠️ Unknown button action '{action}' for {button.label}")
+
     def log_system_status(self):
         logger.info("📊 System Status:")
         if self.voltage_sensor_manager:
@@ -119,23 +189,32 @@ class DeviceManager:
             for button_id, state in self.button_manager.buttons.items():
                 logger.info(f"  {button_id}: {state.get_state()}")
 
+    def reload_gates_config(self, gates_config):
+        """Apply a changed gates.json: rebuild the gate PWM tables and the routing."""
+        self.gates_config = gates_config
+        if self.gate_manager:
+            self.gate_manager.reload_config(gates_config)
+        self.compile_routing()
+
+    def compile_routing(self):
+        """(Re)build the device-to-gate bitmasks; call again after a config file changes.
+
+        Tools in the duct topology open the gates on their path from the collector; other
+        devices fall back to their gate_prefs list.
+        """
+        devices = [(device['id'], device.get('preferences', {}).get('gate_prefs', [])) for device in self.device_config]
+        if getattr(self, 'gui_button_manager', None):
+            devices += [(button_id, button.gate_prefs) for button_id, button in self.gui_button_manager.gui_buttons.items()]
+        devices = [(device_id, self.duct_topology.gates_for(device_id) if device_id in self.duct_topology else gate_prefs)
+                   for device_id, gate_prefs in devices]
+        self.duct_topology.validate(self.gates_config)
+        self.routing.compile(devices, list(self.gates_config))
+
     def get_gates_to_open(self, voltage_states, button_states, gui_button_states):
-        gates_to_open = set()
-        
-        for sensor_id, state in voltage_states.items():
-            if state == 'on':
-                sensor_config = next((device for device in self.device_config if device['id'] == sensor_id), None)
-                if sensor_config and 'preferences' in sensor_config and 'gate_prefs' in sensor_config['preferences']:
-                    gates_to_open.update(sensor_config['preferences']['gate_prefs'])
-        
-        all_button_states = {**button_states, **gui_button_states}
-        for button_id, state in all_button_states.items():
-            if state == 'on':
-                button_config = next((device for device in self.device_config if device['id'] == button_id), None)
-                if button_config and 'preferences' in button_config and 'gate_prefs' in button_config['preferences']:
-                    gates_to_open.update(button_config['preferences']['gate_prefs'])
-        
-        return list(gates_to_open)
+        active = [sensor_id for sensor_id, state in voltage_states.items() if state == 'on']
+        # GUI buttons report True/False, physical buttons 'on'/'off'
+        active += [button_id for button_id, state in {**button_states, **gui_button_states}.items() if state == 'on' or state is True]
+        return self.routing.gates_to_open(active)
 
     def update_rgbleds(self, voltage_states, button_states, gui_button_states):
         current_led_states = {}
@@ -45,6 +45,14 @@ class DustCollectorManager:
                 if removed_users:
                     logger.info(f"Dust collector {collector_id} removed users: {removed_users}")
 
+    def force_off(self):
+        """Turn every collector off now, without waiting for its minimum up time."""
+        for collector_id, collector in self.collectors.items():
+            self.collector_users[collector_id] = set()
+            if collector.relay_status == "on":
+                collector.turn_off()
+                logger.info(f"💨 🛑 Dust Collector {collector_id} forced off 🛑")
+
     def _manage_collectors(self):
         while not self._stop_thread.is_set():
             for collector_id, collector in self.collectors.items():
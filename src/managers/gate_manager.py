@@ -1,12 +1,27 @@
 import time
+from collections import deque
 from loguru import logger
-from devices.gate import Gate
+from devices.gate import Gate, MOVING, SETTLED
+from utils.timer_wheel import TimerWheel
+from boards.pca9685 import batch_writes
 
 class GateManager:
-    def __init__(self, boards, gates_config):
+    def __init__(self, boards, gates_config, app_config=None):
         self.boards = boards
         self.gates_config = gates_config
         self.gates = {}
+        gate_settings = (app_config or {}).get('GATE_SETTINGS', {})
+        self.settle_time = gate_settings.get('SETTLE_TIME', 0.1)
+        # Per-gate settle deadlines; update() fires them from the control loop
+        self.timer_wheel = TimerWheel(gate_settings.get('TIMER_TICK', 0.01))
+        self.settle_timers = {}
+        # Open the new gates and let them settle before closing the old ones, so the
+        # collector never pulls against closed ductwork
+        self.make_before_break = gate_settings.get('MAKE_BEFORE_BREAK', True)
+        self.overlap_margin = gate_settings.get('OVERLAP_MARGIN', 0.0)
+        self.pending_transition = None
+        self.transitions = deque(maxlen=50)
+        self.superseded_transitions = 0
         self.previous_gate_states = {}  # Add this line to track previous states
         self.last_active_device = None  # Add this line to track the last active device
         logger.info("🔧 Initializing GateManager")
@@ -21,7 +36,7 @@ class GateManager:
                     continue
                 try:
                     self.gates[gate_id] = Gate(gate_id, gate_config, self.boards)
-                    self.previous_gate_states[gate_id] = gate_config['state']  # Initialize previous state
+                    self.previous_gate_states[gate_id] = self.gates[gate_id].state  # Initialize previous state
                     logger.info(f"✅ ⛩️  Gate {gate_id} initialized on board {board_id}")
                 except Exception as e:
                     logger.error(f"💢 Error initializing gate {gate_id}: {str(e)}")
@@ -29,31 +44,81 @@ class GateManager:
             logger.error(f"💢 Error initializing gates: {str(e)}")
             raise e
 
+    def reload_config(self, gates_config):
+        """Apply changed angles, settle times and calibration from gates.json to the running gates."""
+        self.gates_config = gates_config
+        for gate_id, gate_config in gates_config.items():
+            if gate_id in self.gates:
+                self.gates[gate_id].configure(gate_config)
+        logger.info("⛩️  Gate PWM tables rebuilt")
+
     def set_gates(self, gates_to_open):
         try:
             if not gates_to_open:
                 return  # Exit the method early if gates_to_open is empty
 
-            changed_gates = []
-            for gate_id, gate in self.gates.items():
-                new_state = 'open' if gate_id in gates_to_open else 'closed'
-                if new_state != self.previous_gate_states[gate_id]:
-                    if new_state == 'open':
-                        gate.open()
-                    else:
-                        gate.close()
-                    self.previous_gate_states[gate_id] = new_state
-                    changed_gates.append(f"{gate_id} ({new_state})")
-
-            time.sleep(0.1)
-            for gate in self.gates.values():
-                gate.stop_servo()
-
-            if changed_gates:
-                logger.info(f"⛩️  Gates updated: {', '.join(changed_gates)}")
+            if self.pending_transition:
+                # Replanned below from the gates' current positions
+                self.pending_transition['timer'].cancel()
+                self.pending_transition = None
+                self.superseded_transitions += 1
+
+            to_open = [gate_id for gate_id in self.gates
+                       if gate_id in gates_to_open and self.previous_gate_states[gate_id] != 'open']
+            to_close = [gate_id for gate_id in self.gates
+                        if gate_id not in gates_to_open and self.previous_gate_states[gate_id] != 'closed']
+            if not to_open and not to_close:
+                return
+
+            for gate_id in to_open:
+                self._move_gate(gate_id, 'open')
+            if to_open and to_close and self.make_before_break:
+                settle = max(self._settle_time(self.gates[gate_id]) for gate_id in to_open) + self.overlap_margin
+                transition = {'started': time.monotonic(), 'opened': to_open, 'closing': to_close}
+                transition['timer'] = self.timer_wheel.schedule(settle, lambda: self._finish_transition(transition))
+                self.pending_transition = transition
+                logger.info(f"⛩️  Gates opening: {', '.join(to_open)}; closing {', '.join(to_close)} once they settle")
+                return
+
+            for gate_id in to_close:
+                self._move_gate(gate_id, 'closed')
+            logger.info(f"⛩️  Gates updated: {', '.join(f'{gate_id} (open)' for gate_id in to_open)}"
+                        f"{', ' if to_open and to_close else ''}{', '.join(f'{gate_id} (closed)' for gate_id in to_close)}")
         except Exception as e:
             logger.error(f"💢 Error setting gates: {str(e)}")
 
+    def _move_gate(self, gate_id, new_state):
+        gate = self.gates[gate_id]
+        if new_state == 'open':
+            gate.open()
+        else:
+            gate.close()
+        self.start_motion(gate)
+        self.previous_gate_states[gate_id] = new_state
+
+    def _finish_transition(self, transition):
+        """Break phase: the new gates have settled, close the old ones."""
+        self.pending_transition = None
+        with batch_writes(self.gate_boards()):
+            for gate_id in transition['closing']:
+                self._move_gate(gate_id, 'closed')
+        overlap = time.monotonic() - transition['started']
+        self.transitions.append({'opened': transition['opened'], 'closed': transition['closing'], 'overlap': overlap})
+        logger.info(f"⛩️  Gates closed after {overlap * 1000:.0f} ms overlap: {', '.join(transition['closing'])}")
+
+    def get_transition_metrics(self):
+        """How long recent make-before-break transitions kept old and new gates open together."""
+        overlaps = [transition['overlap'] for transition in self.transitions]
+        return {
+            'transitions': len(overlaps),
+            'superseded': self.superseded_transitions,
+            'pending': self.pending_transition is not None,
+            'last_overlap': overlaps[-1] if overlaps else None,
+            'mean_overlap': sum(overlaps) / len(overlaps) if overlaps else None,
+            'max_overlap': max(overlaps) if overlaps else None,
+            'recent': list(self.transitions),
+        }
+
     def test_gates(self):
         for gate in self.gates.values():
             logger.info(f'Testing gate {gate.name}')
@@ -62,13 +127,35 @@ class GateManager:
             gate.open()
             time.sleep(1)
 
+    def gate_boards(self):
+        return list({id(gate.board): gate.board for gate in self.gates.values()}.values())
+
     def open_all_gates(self):
-        for gate in self.gates.values():
-            gate.open()
+        with batch_writes(self.gate_boards()):
+            for gate in self.gates.values():
+                gate.open()
+                self.start_motion(gate)
 
     def close_all_gates(self):
+        with batch_writes(self.gate_boards()):
+            for gate in self.gates.values():
+                self.close_gate(gate.name)
+                self.start_motion(gate)
+
+    def stop_all_servos(self):
+        """De-energize every gate servo, with one broadcast write per board where possible."""
+        channels = {}
+        for gate in self.gates.values():
+            channels.setdefault(id(gate.board), (gate.board, []))[1].append(gate.pin)
+        for board, pins in channels.values():
+            if hasattr(board, 'stop_channels'):
+                board.stop_channels(pins)
+            else:
+                for gate in self.gates.values():
+                    if gate.board is board:
+                        gate.stop_servo()
         for gate in self.gates.values():
-            self.close_gate(gate.name)
+            gate.motion = SETTLED
 
     def open_gate(self, name):
         if name in self.gates:
@@ -106,14 +193,45 @@ class GateManager:
 
         return open_gates
     
+    def start_motion(self, gate):
+        """Mark a gate that was just driven as moving and (re)start its settle timer."""
+        timer = self.settle_timers.pop(gate.name, None)
+        if timer:
+            timer.cancel()  # Reversed before it settled: the new move gets the full settle time
+        gate.motion = MOVING
+        self.settle_timers[gate.name] = self.timer_wheel.schedule(self._settle_time(gate), lambda: self._settle(gate))
+
+    def _settle_time(self, gate):
+        return gate.settle_time if gate.settle_time is not None else self.settle_time
+
+    def _settle(self, gate):
+        self.settle_timers.pop(gate.name, None)
+        try:
+            gate.stop_servo()
+        except Exception as e:
+            logger.error(f"💢 Failed to stop servo of gate {gate.name}: {e}")
+        gate.motion = SETTLED
+
     def update(self):
-        # This method can be used for any continuous updates needed for gates
-        pass
+        """De-energize the gates whose settle time is over. Call from the control loop."""
+        self.timer_wheel.advance()
+
+    def next_deadline(self):
+        """Monotonic time the next gate settles, or None when no gate is moving."""
+        return self.timer_wheel.next_deadline()
+
+    def get_gate_states(self):
+        return {gate_id: {'state': gate.state, 'motion': gate.motion} for gate_id, gate in self.gates.items()}
 
     def cleanup(self):
         logger.info("🧹 Cleaning up GateManager")
-        for gate in self.gates.values():
-            gate.stop_servo()
+        if self.pending_transition:
+            self.pending_transition['timer'].cancel()
+            self.pending_transition = None
+        for timer in self.settle_timers.values():
+            timer.cancel()
+        self.settle_timers = {}
+        self.stop_all_servos()
         logger.info("✅ ⛩️  All gates closed during cleanup")
 
 
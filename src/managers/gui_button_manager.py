@@ -30,6 +30,9 @@ class GuiButtonManager(QObject):
 
     def handle_gui_button_state_change(self, button_id, new_state):
         logger.info(f"🟢 GUI Button '{button_id}' toggled to {'On' if new_state else 'Off'}")
+        event_queue = getattr(self.device_manager, 'event_queue', None)
+        if event_queue is not None:
+            event_queue.put('gui_button', button_id, 'toggle', new_state)
         self.button_state_changed.emit(button_id, new_state)
         # Additional logic can be added here if needed
 
@@ -2,12 +2,28 @@ import threading
 import time
 from loguru import logger
 from devices.voltage_sensor import VoltageSensor
+from utils.batch_detection import BatchDetectionGroup
+from utils.flight_recorder import FlightRecorder
+from utils.history import HistoryRecorder
 
 class VoltageSensorManager:
-    def __init__(self, device_config, boards, app_config):
+    def __init__(self, device_config, boards, app_config, event_queue=None):
         self.voltage_sensors = {}  # Changed from self.sensors
         self.boards = boards
+        self.event_queue = event_queue
         self.stop_event = threading.Event()
+        # "batch" evaluates all sensors of a board from one sample matrix per tick instead of
+        # streaming every reading through each sensor's detector
+        self.detection_mode = app_config['VOLTAGE_SENSOR_SETTINGS'].get('DETECTION_MODE', 'streaming')
+        self.batch_groups = []
+        self.sensor_groups = {}
+        self.streaming_sensors = []
+        health_settings = app_config.get('SENSOR_HEALTH_SETTINGS', {})
+        self.health_enabled = health_settings.get('ENABLED', False)
+        self.health_check_interval = health_settings.get('CHECK_INTERVAL', 1.0)
+        self.last_health_check = 0.0
+        recorder_settings = app_config.get('FLIGHT_RECORDER_SETTINGS', {})
+        self.flight_recorder = FlightRecorder(recorder_settings) if recorder_settings.get('ENABLED', False) else None
         
         for device in device_config:
             if device['type'].lower() == 'voltage_sensor':
@@ -18,17 +34,110 @@ class VoltageSensorManager:
                     logger.error(f"Board {sensor.board_id} not found for voltage sensor {sensor.id}")
                     continue
                 
-                sensor.set_board(board)
+                batched = self.detection_mode == 'batch' and self.can_batch(sensor, board)
+                sensor.set_board(board, streaming=not batched)
+                if not batched:
+                    self.streaming_sensors.append(sensor)
                 self.voltage_sensors[sensor.id] = sensor  # Changed from self.sensors
         
+        if self.detection_mode == 'batch':
+            self.build_batch_groups()
         logger.info(f"Initialized {len(self.voltage_sensors)} voltage sensors")  # Changed from self.sensors
+        self.apply_sampling_plans(device_config)
+
+        history_settings = app_config.get('HISTORY_SETTINGS', {})
+        self.history = None
+        if history_settings.get('ENABLED', False):
+            self.history = HistoryRecorder(history_settings, self.boards, self.build_sampling_plans(device_config))
+            self.history.start()
+
+    @staticmethod
+    def can_batch(sensor, board):
+        return hasattr(type(sensor.detector), 'batch_values') and hasattr(board, 'get_window_matrix')
+
+    def build_batch_groups(self):
+        groups = {}
+        for sensor in self.voltage_sensors.values():
+            if sensor not in self.streaming_sensors:
+                groups.setdefault(BatchDetectionGroup.key(sensor), []).append(sensor)
+        self.batch_groups = [BatchDetectionGroup(sensors[0].board, sensors) for sensors in groups.values()]
+        self.sensor_groups = {sensor.id: group for group in self.batch_groups for sensor in group.sensors}
+        logger.info(f"🧮 Batch detection: {len(self.sensor_groups)} sensors in {len(self.batch_groups)} groups, "
+                    f"{len(self.streaming_sensors)} streaming")
+
+    @staticmethod
+    def build_sampling_plans(device_config):
+        """Map each board ID to a {pin: weight} plan covering only the pins wired to voltage sensors."""
+        plans = {}
+        for device in device_config:
+            if device['type'].lower() == 'voltage_sensor':
+                board_id = device['connection']['board']
+                pin = device['connection']['pin']
+                weight = device.get('preferences', {}).get('sample_weight', 1)
+                plan = plans.setdefault(board_id, {})
+                plan[pin] = max(plan.get(pin, 0), weight)
+        return plans
+
+    def apply_sampling_plans(self, device_config):
+        plans = self.build_sampling_plans(device_config)
+        for board_id, board in self.boards.items():
+            if hasattr(board, 'set_sampling_plan'):
+                board.set_sampling_plan(plans.get(board_id, {}))
 
     def update(self):
-        state_changed = False
-        for sensor in self.voltage_sensors.values():  # Changed from self.sensors
+        for board in self.boards.values():
+            if hasattr(board, 'poll'):
+                # Boards sampled by the acquisition process hand over their new samples here
+                board.poll()
+        state_changed = self.update_batches()
+        for sensor in self.streaming_sensors:
             if sensor.board.is_initialized:
                 if sensor.update():
                     state_changed = True
+                    sensor.board.escalate_data_rate()
+                    self.record_transition(sensor)
+                elif sensor.is_near_threshold():
+                    # Sample faster while the sensor is close to switching so the transition is caught quickly
+                    sensor.board.escalate_data_rate()
+        if self.flight_recorder:
+            self.flight_recorder.update()
+        if self.health_enabled and time.monotonic() - self.last_health_check >= self.health_check_interval:
+            self.last_health_check = time.monotonic()
+            self.check_health()
+        return state_changed
+
+    def check_health(self):
+        return {sensor_id: sensor.check_health() for sensor_id, sensor in self.voltage_sensors.items()}
+
+    def get_health_report(self):
+        """Health state and open issues of every monitored sensor input."""
+        return {sensor_id: sensor.health.report() for sensor_id, sensor in self.voltage_sensors.items()
+                if sensor.health is not None}
+
+    def record_transition(self, sensor):
+        if self.event_queue is not None:
+            self.event_queue.put('voltage_sensor', sensor.id, sensor.state)
+        if self.flight_recorder:
+            self.flight_recorder.trigger(sensor)
+
+    def refresh_group(self, sensor_id):
+        group = self.sensor_groups.get(sensor_id)
+        if group:
+            group.refresh()
+
+    def update_batches(self):
+        state_changed = False
+        for group in self.batch_groups:
+            if not group.board.is_initialized:
+                continue
+            changed = group.update()
+            if changed:
+                state_changed = True
+                group.board.escalate_data_rate()
+                for index in changed:
+                    self.record_transition(group.sensors[index])
+            elif group.near_threshold():
+                group.board.escalate_data_rate()
         return state_changed
 
     def cleanup(self):
@@ -36,6 +145,10 @@ class VoltageSensorManager:
         self.stop_event.set()
         for sensor in self.voltage_sensors.values():  # Changed from self.sensors
             sensor.cleanup()
+        if self.flight_recorder:
+            self.flight_recorder.stop()
+        if self.history:
+            self.history.stop()
         logger.info("✅ VoltageSensorManager cleanup completed")
 
     def start_monitoring(self):
@@ -48,6 +161,14 @@ class VoltageSensorManager:
         logger.info("🛑 Stopping voltage sensor monitoring")
         self.stop_event.set()
 
+    def get_sample_rates(self):
+        """Samples per second each sensor's pin is actually getting."""
+        return {sensor_id: sensor.board.get_sample_rates().get(sensor.pin, 0.0) for sensor_id, sensor in self.voltage_sensors.items()}
+
+    def get_transition_counts(self):
+        """Per-sensor state changes, and how many flaps the hysteresis and dwell times suppressed."""
+        return {sensor_id: sensor.get_transition_counts() for sensor_id, sensor in self.voltage_sensors.items()}
+
     def get_sensor_status(self, sensor_id):
         sensor = self.voltage_sensors.get(sensor_id)  # Changed from self.sensors
         return sensor.get_status() if sensor else None
@@ -59,6 +180,7 @@ class VoltageSensorManager:
         sensor = self.voltage_sensors.get(sensor_id)
         if sensor:
             sensor.reset()
+            self.refresh_group(sensor_id)
             logger.info(f"Reset sensor {sensor_id}")
         else:
             logger.error(f"Sensor {sensor_id} not found")
@@ -66,12 +188,15 @@ class VoltageSensorManager:
     def reset_all_sensors(self):
         for sensor in self.voltage_sensors.values():
             sensor.reset()
+        for group in self.batch_groups:
+            group.refresh()
         logger.info("Reset all sensors")
 
     def update_sensor_threshold(self, sensor_id, new_threshold):
         sensor = self.voltage_sensors.get(sensor_id)
         if sensor:
-            sensor.sd_threshold = new_threshold
+            sensor.set_threshold(new_threshold)
+            self.refresh_group(sensor_id)
             logger.info(f"Updated threshold for sensor {sensor_id} to {new_threshold}")
         else:
             logger.error(f"Sensor {sensor_id} not found")
@@ -0,0 +1,68 @@
+import numpy as np
+
+INTERVAL_HISTORY = 1024  # Inter-sample intervals kept for percentile estimates
+GAP_FACTOR = 2.0         # An interval this many times the expected period counts as a gap
+
+class AcquisitionStats:
+    """Timing statistics for one sampled input.
+
+    record() is called from the sampling thread with each sample's monotonic timestamp and
+    costs O(1); percentiles are only computed when a report is asked for.
+    """
+
+    def __init__(self, expected_period=None):
+        self.expected_period = expected_period
+        self.intervals = [0.0] * INTERVAL_HISTORY
+        self.index = 0
+        self.recorded = 0
+        self.samples = 0
+        self.gaps = 0
+        self.missed_deadlines = 0
+        self.overruns = 0
+        self.last_timestamp_ns = None
+
+    def set_expected_period(self, expected_period):
+        self.expected_period = expected_period
+        # The next interval spans the schedule change, so do not count it
+        self.last_timestamp_ns = None
+
+    def record(self, timestamp_ns):
+        self.samples += 1
+        if self.last_timestamp_ns is not None:
+            interval = (timestamp_ns - self.last_timestamp_ns) / 1e9
+            self.intervals[self.index] = interval
+            self.index = (self.index + 1) % INTERVAL_HISTORY
+            self.recorded += 1
+            if self.expected_period and interval > self.expected_period * GAP_FACTOR:
+                self.gaps += 1
+        self.last_timestamp_ns = timestamp_ns
+
+    def record_missed_deadline(self):
+        self.missed_deadlines += 1
+
+    def record_overrun(self):
+        self.overruns += 1
+
+    def report(self):
+        count = min(self.recorded, INTERVAL_HISTORY)
+        report = {
+            'samples': self.samples,
+            'expected_interval_ms': self.expected_period * 1000 if self.expected_period else None,
+            'p50_interval_ms': None,
+            'p99_interval_ms': None,
+            'max_interval_ms': None,
+            'jitter_ms': None,
+            'gaps': self.gaps,
+            'missed_deadlines': self.missed_deadlines,
+            'overruns': self.overruns,
+        }
+        if count:
+            intervals = np.array(self.intervals[:count]) * 1000
+            p50, p99 = np.percentile(intervals, [50, 99])
+            report.update({
+                'p50_interval_ms': float(p50),
+                'p99_interval_ms': float(p99),
+                'max_interval_ms': float(intervals.max()),
+                'jitter_ms': float(p99 - p50),
+            })
+        return report
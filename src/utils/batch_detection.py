@@ -0,0 +1,63 @@
+import numpy as np
+
+class BatchDetectionGroup:
+    """Voltage sensors on one board that share a detector type and window size.
+
+    Instead of every sensor keeping its own streaming statistic, the group pulls one
+    (pins, window) sample matrix from the board per tick and evaluates all of its sensors
+    with a single NumPy call. Thresholds and current states live in arrays, so finding
+    the sensors that may change state is a vectorised comparison; only those are handed to
+    their sensor, which applies its dwell times and counts the transition.
+    """
+
+    def __init__(self, board, sensors):
+        self.board = board
+        self.sensors = list(sensors)
+        self.detectors = [sensor.detector for sensor in self.sensors]
+        self.detector_class = type(self.detectors[0])
+        self.window_size = self.detectors[0].window_size
+        self.pins = np.array([sensor.pin for sensor in self.sensors], dtype=np.intp)
+        self.values = np.zeros(len(self.sensors))
+        self.is_ready = False
+        self.refresh()
+
+    @staticmethod
+    def key(sensor):
+        """Sensors with equal keys on the same board can be evaluated together."""
+        return (sensor.board_id, type(sensor.detector), sensor.detector.window_size)
+
+    def refresh(self):
+        """Reload thresholds and states after sensors were retuned or reset."""
+        self.is_on = np.array([sensor.state == 'on' for sensor in self.sensors])
+        self.raw_on = np.array([sensor.raw_state == 'on' for sensor in self.sensors])
+        self.on_thresholds = np.array([sensor.threshold for sensor in self.sensors], dtype=float)
+        self.off_thresholds = np.array([sensor.off_threshold for sensor in self.sensors], dtype=float)
+        ratios = np.array([sensor.escalation_ratio for sensor in self.sensors], dtype=float)
+        self.near_low = self.off_thresholds * ratios
+        self.near_high = self.on_thresholds / ratios
+
+    def update(self):
+        """Evaluate every sensor in the group; returns the indices of sensors that changed state."""
+        matrix = self.board.get_window_matrix(self.pins, self.window_size)
+        self.is_ready = matrix.shape[1] >= self.window_size
+        if not self.is_ready:
+            return []
+        self.values = self.detector_class.batch_values(matrix, self.detectors)
+        raw_on = self.values > self.on_thresholds
+        wants_on = np.where(self.is_on, self.values > self.off_thresholds, raw_on)
+        candidates = np.flatnonzero((wants_on != self.is_on) | (raw_on != self.raw_on))
+        self.raw_on = raw_on
+
+        changed = []
+        for index in candidates:
+            sensor = self.sensors[index]
+            if sensor.apply_value(float(self.values[index])):
+                changed.append(index)
+            self.is_on[index] = sensor.state == 'on'
+        return changed
+
+    def near_threshold(self):
+        """True when any sensor of the group is within escalation range of its threshold."""
+        if not self.is_ready:
+            return False
+        return bool(np.any((self.values >= self.near_low) & (self.values <= self.near_high)))
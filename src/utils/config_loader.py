@@ -2,19 +2,25 @@ import json
 import os
 from loguru import logger
 
+GATES_PATH = 'src/config/gates.json'
+
 class ConfigLoader:
     def __init__(self):
         self.app_config = None
         self.boards = None
         self.devices = None
         self.gates = None
+        self.duct_topology = None
+        self.gates_mtime = None
 
     def reload_configs(self):
         try:
             self.app_config = self.load_config('src/config/app_config.json')
             self.boards = self.load_config('src/config/boards.json')
             self.devices = self.load_config('src/config/devices.json')
-            self.gates = self.load_config('src/config/gates.json')
+            self.gates = self.load_config(GATES_PATH)
+            self.gates_mtime = self._mtime(GATES_PATH)
+            self.duct_topology = self.load_config('src/config/duct_topology.json')
         except Exception as e:
             logger.error(f"💥 Error loading configurations: {str(e)}")
             raise
@@ -42,3 +48,26 @@ class ConfigLoader:
 
     def get_gates(self):
         return self.gates
+
+    def reload_gates_if_changed(self):
+        """Reload gates.json if the file changed since it was last read; True when it did."""
+        mtime = self._mtime(GATES_PATH)
+        if mtime is None or mtime == self.gates_mtime:
+            return False
+        self.gates_mtime = mtime
+        gates = self.load_config(GATES_PATH)
+        if not gates:
+            return False  # Keep the old config while the file is half-written or broken
+        self.gates = gates
+        logger.info("🔄 gates.json changed, reloaded")
+        return True
+
+    @staticmethod
+    def _mtime(file_path):
+        try:
+            return os.path.getmtime(file_path)
+        except OSError:
+            return None
+
+    def get_duct_topology(self):
+        return self.duct_topology
@@ -0,0 +1,84 @@
+import math
+
+# Events a physical button emits
+PRESS = 'press'
+RELEASE = 'release'
+LONG_PRESS = 'long_press'
+DOUBLE_PRESS = 'double_press'
+
+# Per-button timing, overridden with the "button_timing" dict in devices.json preferences
+DEFAULT_TIMING = {
+    'debounce_time': 0.03,      # Contact must read the same for this long to count
+    'long_press_time': 1.0,     # Held this long: one long_press event while still held
+    'double_press_time': 0.4,   # Second press starting this soon after the first press
+}
+
+class ButtonDebouncer:
+    """Integrating debounce state machine for one button, turning raw samples into events.
+
+    An integrator counts up on every pressed sample and down on every released one,
+    clamped to the number of samples in debounce_time. The debounced state only flips
+    when it reaches either end, so bounces and single-sample glitches cancel out instead
+    of restarting a timer. Long presses are timed from the debounced press, so call
+    tick() between samples while the button is busy.
+    """
+
+    def __init__(self, timing=None, sample_interval=0.01):
+        timing = {**DEFAULT_TIMING, **(timing or {})}
+        self.integrator_max = max(1, math.ceil(timing['debounce_time'] / sample_interval - 1e-9))
+        self.long_press_time = timing['long_press_time']
+        self.double_press_time = timing['double_press_time']
+        self.integrator = 0
+        self.pressed = False
+        self.pressed_at = None
+        self.long_press_sent = False
+        self.last_press_at = None
+
+    def update(self, raw_pressed, now):
+        """Feed one raw sample taken at monotonic time now; returns the events it caused."""
+        if raw_pressed:
+            self.integrator = min(self.integrator + 1, self.integrator_max)
+        else:
+            self.integrator = max(self.integrator - 1, 0)
+        return self._apply(now)
+
+    def latch(self, pressed, now):
+        """Take a state latched by the hardware (MCP23017 INTCAP) as a confirmed transition.
+
+        The integrator is set straight to that end, so a press that is already over when
+        the port is read still produces its press event; the release then debounces as usual.
+        """
+        self.integrator = self.integrator_max if pressed else 0
+        return self._apply(now)
+
+    def _apply(self, now):
+        events = []
+        if not self.pressed and self.integrator == self.integrator_max:
+            self.pressed = True
+            self.pressed_at = now
+            self.long_press_sent = False
+            events.append(PRESS)
+            if self.last_press_at is not None and now - self.last_press_at <= self.double_press_time:
+                events.append(DOUBLE_PRESS)
+                self.last_press_at = None  # A third quick press starts a new pair
+            else:
+                self.last_press_at = now
+        elif self.pressed and self.integrator == 0:
+            self.pressed = False
+            events.append(RELEASE)
+        events.extend(self.tick(now))
+        return events
+
+    def tick(self, now):
+        """Events that are due by time alone, i.e. a long press of a button still held down."""
+        if self.last_press_at is not None and not self.pressed and now - self.last_press_at > self.double_press_time:
+            self.last_press_at = None  # Double-press window is over
+        if self.pressed and not self.long_press_sent and now - self.pressed_at >= self.long_press_time:
+            self.long_press_sent = True
+            return [LONG_PRESS]
+        return []
+
+    @property
+    def busy(self):
+        """True while integrating, held down or waiting for a possible second press."""
+        return self.pressed or self.integrator != 0 or self.last_press_at is not None
@@ -0,0 +1,317 @@
+import cmath
+import math
+from collections import deque
+import numpy as np
+from loguru import logger
+from utils.rolling_stats import RollingStats, RECOMPUTE_INTERVAL
+
+# Streaming on/off detectors for voltage sensors.
+#
+# A detector is a sample listener: the board calls push(value) for every new reading on
+# the sensor's pin. Each push costs O(1). Once is_ready, value is the statistic that the
+# sensor compares against its threshold. Detectors are picked per device with the
+# "detector" dict in devices.json preferences, e.g. {"type": "goertzel", "frequency": 60}.
+#
+# Detectors with a batch_values classmethod can also be evaluated for many sensors at once
+# from a (sensors, window) sample matrix, see utils.batch_detection.
+
+class RollingStdDetector:
+    """Standard deviation of the readings over a sliding window (the original detector)."""
+
+    name = 'rolling_std'
+
+    def __init__(self, window_size, settings):
+        self.window_size = window_size
+        self.stats = RollingStats(window_size)
+
+    def reset(self):
+        self.stats.reset()
+
+    def push(self, value):
+        self.stats.push(value)
+
+    @property
+    def is_ready(self):
+        return self.stats.is_full
+
+    @property
+    def value(self):
+        return self.stats.std
+
+    @classmethod
+    def batch_values(cls, matrix, detectors):
+        return matrix.std(axis=1)
+
+
+class RollingRMSDetector:
+    """Root mean square of the readings over a sliding window, measured from an offset.
+
+    Set "offset" to the sensor's zero-current output (e.g. VCC/2 for an ACS712) to get the
+    RMS of the AC signal alone.
+    """
+
+    name = 'rms'
+
+    def __init__(self, window_size, settings):
+        self.window_size = window_size
+        self.offset = settings.get('offset', 0.0)
+        self.reset()
+
+    def reset(self):
+        self.window = [0.0] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.sum_squares = 0.0
+        self._until_recompute = self.window_size * RECOMPUTE_INTERVAL
+
+    def push(self, value):
+        square = (value - self.offset) ** 2
+        if self.count < self.window_size:
+            self.count += 1
+        else:
+            self.sum_squares -= self.window[self.index]
+        self.sum_squares += square
+        self.window[self.index] = square
+        self.index = (self.index + 1) % self.window_size
+
+        self._until_recompute -= 1
+        if self._until_recompute <= 0:
+            self.sum_squares = math.fsum(self.window[:self.count])
+            self._until_recompute = self.window_size * RECOMPUTE_INTERVAL
+
+    @property
+    def is_ready(self):
+        return self.count >= self.window_size
+
+    @property
+    def value(self):
+        return math.sqrt(max(self.sum_squares, 0.0) / self.count) if self.count else 0.0
+
+    @classmethod
+    def batch_values(cls, matrix, detectors):
+        offsets = np.array([detector.offset for detector in detectors])
+        return np.sqrt(np.mean(np.square(matrix - offsets[:, None]), axis=1))
+
+
+class PeakToPeakDetector:
+    """Largest minus smallest reading over a sliding window, using monotonic deques."""
+
+    name = 'peak_to_peak'
+
+    def __init__(self, window_size, settings):
+        self.window_size = window_size
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.maxima = deque()  # (index, value), values decreasing
+        self.minima = deque()  # (index, value), values increasing
+
+    def push(self, value):
+        index = self.count
+        self.count += 1
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((index, value))
+        while self.minima and self.minima[-1][1] >= value:
+            self.minima.pop()
+        self.minima.append((index, value))
+
+        oldest = index - self.window_size
+        if self.maxima[0][0] <= oldest:
+            self.maxima.popleft()
+        if self.minima[0][0] <= oldest:
+            self.minima.popleft()
+
+    @property
+    def is_ready(self):
+        return self.count >= self.window_size
+
+    @property
+    def value(self):
+        return self.maxima[0][1] - self.minima[0][1] if self.count else 0.0
+
+    @classmethod
+    def batch_values(cls, matrix, detectors):
+        return np.ptp(matrix, axis=1)
+
+
+class BaselineDeviationDetector:
+    """Fraction of the window that lies outside a band around the idle baseline.
+
+    The baseline is the mean of the first full window after a reset, so the tool should be
+    off when the sensor starts; set "baseline" to use a fixed value instead. "band" is the
+    allowed deviation as a fraction of the baseline, never less than "min_band" volts so a
+    baseline near 0 V (rectified CT sensors) does not put every reading outside.
+    """
+
+    name = 'percent_outside_baseline'
+
+    def __init__(self, window_size, settings):
+        self.window_size = window_size
+        self.fixed_baseline = settings.get('baseline')
+        self.band = settings.get('band', 0.1)
+        self.min_band = settings.get('min_band', 0.01)
+        self.reset()
+
+    def reset(self):
+        self.baseline = self.fixed_baseline
+        self._learning_sum = 0.0
+        self._learned = 0
+        self.outside = [False] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.outside_count = 0
+
+    def push(self, value):
+        if self.baseline is None:
+            self._learning_sum += value
+            self._learned += 1
+            if self._learned >= self.window_size:
+                self.baseline = self._learning_sum / self._learned
+                logger.debug(f"📏 Learned baseline {self.baseline:.4f}V")
+            return
+
+        margin = max(abs(self.baseline) * self.band, self.min_band)
+        outside = abs(value - self.baseline) > margin
+        if self.count < self.window_size:
+            self.count += 1
+        elif self.outside[self.index]:
+            self.outside_count -= 1
+        if outside:
+            self.outside_count += 1
+        self.outside[self.index] = outside
+        self.index = (self.index + 1) % self.window_size
+
+    @property
+    def is_ready(self):
+        return self.count >= self.window_size
+
+    @property
+    def value(self):
+        return self.outside_count / self.count if self.count else 0.0
+
+
+class GoertzelDetector:
+    """Amplitude of the mains frequency over a sliding window, tracked as a single DFT bin.
+
+    Each reading adds x[n]·e^(-jωn) to a running sum and removes the term that left the
+    window, which is the Goertzel single-bin result updated in O(1) per sample. The window
+    mean is removed through the matching sum of phasors so DC offset does not leak into
+    the bin. Motors draw current at the mains frequency while tool noise is broadband, so
+    this separates on from off where a plain std cannot.
+
+    Each pin is sampled well below 2x mains, so the tone shows up at its alias
+    |f - fs·round(f / fs)|; the detector tunes to that alias for the measured sample rate
+    and warns when the tone folds onto DC, where it cannot be told apart from the offset.
+    A retune keeps the window and re-rotates its phasors for the new bin, so switching the
+    data rate (e.g. while escalated) does not leave the detector warming up again.
+    """
+
+    name = 'goertzel'
+
+    RETUNE_TOLERANCE = 0.05  # Relative change of sample rate that triggers a retune
+    MIN_ALIAS_BINS = 1.0     # Aliased tone must sit at least this many bins away from DC
+
+    def __init__(self, window_size, settings):
+        self.window_size = window_size
+        self.frequency = settings.get('frequency', 60.0)
+        self.sample_rate = None
+        self.omega = None
+        self.step = None  # Per-sample phasor rotation e^(-jω)
+        self.reset()
+
+    def reset(self):
+        self.values = [0.0] * self.window_size
+        self.phasors = [0j] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.value_sum = 0.0
+        self.bin_sum = 0j
+        self.phasor_sum = 0j
+        self.phasor = 1 + 0j
+        self._until_recompute = self.window_size * RECOMPUTE_INTERVAL
+
+    def aliased_frequency(self, sample_rate):
+        return abs(self.frequency - sample_rate * round(self.frequency / sample_rate))
+
+    def set_sample_rate(self, sample_rate):
+        """Tune the bin to where the mains tone lands at this sample rate."""
+        if not sample_rate or sample_rate <= 0:
+            return
+        if self.sample_rate and abs(sample_rate - self.sample_rate) <= self.sample_rate * self.RETUNE_TOLERANCE:
+            return
+        alias = self.aliased_frequency(sample_rate)
+        if alias * self.window_size / sample_rate < self.MIN_ALIAS_BINS:
+            logger.warning(f"⚠️ {self.frequency} Hz aliases to {alias:.2f} Hz at {sample_rate:.1f} SPS, "
+                           f"too close to DC for a {self.window_size} sample window")
+        self.sample_rate = sample_rate
+        self.omega = 2 * math.pi * alias / sample_rate
+        self.step = cmath.exp(-1j * self.omega)
+        self._rotate_window()
+
+    def _rotate_window(self):
+        # The bin magnitude does not depend on the starting phase, so number the samples
+        # held from the oldest and rebuild the sums with the new rotation
+        oldest = self.index if self.count >= self.window_size else 0
+        phasor = 1 + 0j
+        for offset in range(self.count):
+            self.phasors[(oldest + offset) % self.window_size] = phasor
+            phasor *= self.step
+        self.phasor = phasor
+        self._recompute()
+
+    def push(self, value):
+        if self.omega is None:
+            return
+        if self.count < self.window_size:
+            self.count += 1
+        else:
+            self.value_sum -= self.values[self.index]
+            self.bin_sum -= self.values[self.index] * self.phasors[self.index]
+            self.phasor_sum -= self.phasors[self.index]
+        self.values[self.index] = value
+        self.phasors[self.index] = self.phasor
+        self.value_sum += value
+        self.bin_sum += value * self.phasor
+        self.phasor_sum += self.phasor
+        self.index = (self.index + 1) % self.window_size
+
+        self.phasor *= self.step
+        self._until_recompute -= 1
+        if self._until_recompute <= 0:
+            self._recompute()
+
+    def _recompute(self):
+        # Renormalise the rotating phasor and rebuild the sums to stop rounding drift
+        self.phasor /= abs(self.phasor)
+        count = self.count
+        self.value_sum = math.fsum(self.values[:count])
+        self.bin_sum = sum(value * phasor for value, phasor in zip(self.values[:count], self.phasors[:count]))
+        self.phasor_sum = sum(self.phasors[:count])
+        self._until_recompute = self.window_size * RECOMPUTE_INTERVAL
+
+    @property
+    def is_ready(self):
+        return self.count >= self.window_size
+
+    @property
+    def value(self):
+        if not self.count:
+            return 0.0
+        mean = self.value_sum / self.count
+        return 2 * abs(self.bin_sum - mean * self.phasor_sum) / self.count
+
+
+DETECTORS = {detector.name: detector for detector in (
+    RollingStdDetector, RollingRMSDetector, PeakToPeakDetector, BaselineDeviationDetector, GoertzelDetector)}
+
+def create_detector(settings, default_window_size):
+    """Build the detector described by a device's "detector" preferences dict."""
+    settings = settings or {}
+    detector_type = settings.get('type', RollingStdDetector.name)
+    detector_class = DETECTORS.get(detector_type)
+    if detector_class is None:
+        logger.error(f"❌ Unknown detector type '{detector_type}', using {RollingStdDetector.name}")
+        detector_class = RollingStdDetector
+    return detector_class(settings.get('window', default_window_size), settings)
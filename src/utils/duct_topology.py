@@ -0,0 +1,48 @@
+from loguru import logger
+
+class DuctTopology:
+    """Tree of duct branches from the collector out to the tool drops, from duct_topology.json.
+
+    Each branch node can have a blast gate ("gate"), the tools at its drop ("tools") and
+    further "branches". A tool needs every gate on the path from the collector to each
+    node that lists it, and nothing else, so the minimal open set for any group of active
+    tools is the union of their root paths. Adding a gate means adding one node instead of
+    editing the gate_prefs of every tool behind it.
+    """
+
+    def __init__(self, topology=None):
+        topology = topology or {}
+        self.collector = topology.get('collector')
+        self.parents = {}
+        self.tool_gates = {}
+        for branch in topology.get('branches', []):
+            self._add_branch(branch, [])
+        if self.tool_gates:
+            logger.info(f"🌳 Duct topology: {len(self.parents)} gates feeding {len(self.tool_gates)} tools")
+
+    def _add_branch(self, node, path):
+        gate = node.get('gate')
+        if gate:
+            if gate in self.parents:
+                logger.warning(f"⚠️ Gate {gate} appears twice in the duct topology")
+            self.parents[gate] = path[-1] if path else None
+            path = path + [gate]
+        for tool in node.get('tools', []):
+            gates = self.tool_gates.setdefault(tool, [])
+            gates.extend(gate for gate in path if gate not in gates)
+        for branch in node.get('branches', []):
+            self._add_branch(branch, path)
+
+    def __contains__(self, tool):
+        return tool in self.tool_gates
+
+    def gates_for(self, tool):
+        """Every gate between the collector and the drops of tool, upstream first."""
+        return self.tool_gates.get(tool, [])
+
+    def validate(self, gate_names):
+        """Warn about gates in the topology that gates.json does not define."""
+        missing = [gate for gate in self.parents if gate not in gate_names]
+        if missing:
+            logger.warning(f"⚠️ Duct topology uses gates missing from gates.json: {', '.join(missing)}")
+        return missing
@@ -0,0 +1,43 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# One input event: monotonic timestamp, producer ('button', 'voltage_sensor', 'gui_button'),
+# device ID, event kind (e.g. 'press', 'on', 'toggle') and an optional value
+InputEvent = namedtuple('InputEvent', ['timestamp', 'source', 'device_id', 'kind', 'value'])
+
+class EventQueue:
+    """Hands input events from producer threads to the DeviceManager control loop.
+
+    deque.append and deque.popleft are atomic, so producers never take a lock and never
+    block; the threading.Event only wakes the consumer. Each event is kept, so two presses
+    between control loop passes are both seen instead of being merged into one state read.
+    The oldest events are dropped if nobody drains the queue.
+    """
+
+    def __init__(self, maxlen=1024):
+        self._events = deque(maxlen=maxlen)
+        self._wake = threading.Event()
+
+    def put(self, source, device_id, kind, value=None):
+        self._events.append(InputEvent(time.monotonic(), source, device_id, kind, value))
+        self._wake.set()
+
+    def drain(self):
+        """Remove and return every queued event, oldest first."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                return events
+
+    def wait(self, timeout=None):
+        """Block until an event is queued or timeout seconds pass; True if events are waiting."""
+        self._wake.clear()
+        if self._events:
+            return True
+        return self._wake.wait(timeout)
+
+    def __len__(self):
+        return len(self._events)
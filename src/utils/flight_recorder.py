@@ -0,0 +1,190 @@
+import os
+import json
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from loguru import logger
+
+# Each record is a fixed header and JSON metadata, together padded to a multiple of 8 bytes,
+# then n float64 values and n int64 monotonic timestamps, so the arrays stay 8-byte aligned
+# in the file. Records are only ever appended, so a segment can be read with np.memmap while
+# the writer is still adding to it.
+RECORD_MAGIC = b'RUDR'
+RECORD_HEADER = struct.Struct('<4sII')  # magic, metadata length, sample count
+SEGMENT_PREFIX = 'segment_'
+SEGMENT_SUFFIX = '.rec'
+
+class FlightRecorder:
+    """Keeps the raw samples around every voltage sensor state change.
+
+    trigger() notes the moment of a transition. Once the post-trigger time has passed,
+    update() copies the pin's samples from pre_trigger seconds before to post_trigger
+    seconds after the trigger out of the board's ring buffer and queues them. A background
+    thread appends the snapshots to segment files, so the control loop never waits on the
+    SD card. The oldest segments are deleted once the directory exceeds its size cap.
+    """
+
+    def __init__(self, settings):
+        self.directory = settings.get('DIRECTORY', 'logs/flight_recorder')
+        self.pre_trigger = settings.get('PRE_TRIGGER_SECONDS', 2.0)
+        self.post_trigger = settings.get('POST_TRIGGER_SECONDS', 2.0)
+        self.max_segment_bytes = settings.get('MAX_SEGMENT_MB', 16) * 1024 * 1024
+        self.max_total_bytes = settings.get('MAX_TOTAL_MB', 256) * 1024 * 1024
+        self.pending = []
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._segment = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name='flight-recorder', daemon=True)
+        self._writer.start()
+        logger.info(f"📼 Flight recorder keeping {self.pre_trigger}s before and {self.post_trigger}s after "
+                    f"each transition in {self.directory}")
+
+    def trigger(self, sensor):
+        """Record the samples around a state change of sensor, once the post-trigger time has passed."""
+        trigger_ns = time.monotonic_ns()
+        self.pending.append({
+            'sensor': sensor,
+            'trigger_ns': trigger_ns,
+            'wall_time': time.time(),
+            'state': sensor.state,
+            'due_ns': trigger_ns + int(self.post_trigger * 1e9),
+        })
+
+    def update(self):
+        """Snapshot every capture whose post-trigger time is over. Call from the control loop."""
+        if not self.pending:
+            return
+        now = time.monotonic_ns()
+        due = [capture for capture in self.pending if capture['due_ns'] <= now]
+        if due:
+            self.pending = [capture for capture in self.pending if capture['due_ns'] > now]
+            for capture in due:
+                self._snapshot(capture)
+
+    def _snapshot(self, capture):
+        sensor = capture['sensor']
+        board = sensor.board
+        start_ns = capture['trigger_ns'] - int(self.pre_trigger * 1e9)
+        end_ns = capture['trigger_ns'] + int(self.post_trigger * 1e9)
+        with board.lock:
+            values, timestamps = board.buffer.get_samples(sensor.pin, board.max_readings)
+        selected = (timestamps >= start_ns) & (timestamps <= end_ns)
+        if len(timestamps) and timestamps[0] > start_ns and len(timestamps) >= board.max_readings:
+            logger.warning(f"⚠️ 📼 Ring buffer of {sensor.board_id} holds less than {self.pre_trigger}s "
+                           f"of pin {sensor.pin}, the recording of {sensor.label} is cut short")
+        metadata = {
+            'sensor_id': sensor.id,
+            'label': sensor.label,
+            'board_id': sensor.board_id,
+            'pin': sensor.pin,
+            'state': capture['state'],
+            'detector': sensor.detector.name,
+            'on_threshold': sensor.threshold,
+            'off_threshold': sensor.off_threshold,
+            'trigger_ns': capture['trigger_ns'],
+            'wall_time': capture['wall_time'],
+        }
+        self._queue.put((metadata, values[selected], timestamps[selected]))
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._sync(self._segment)
+                break
+            try:
+                self._append(*item)
+                self.recorded += 1
+            except Exception as e:
+                self.dropped += 1
+                logger.error(f"💥 Flight recorder failed to write a recording: {e}")
+
+    def _append(self, metadata, values, timestamps):
+        meta = json.dumps(metadata).encode()
+        meta += b' ' * (-(RECORD_HEADER.size + len(meta)) % 8)
+        record = b''.join((
+            RECORD_HEADER.pack(RECORD_MAGIC, len(meta), len(values)),
+            meta,
+            values.astype('<f8').tobytes(),
+            timestamps.astype('<i8').tobytes(),
+        ))
+        path = self._segment_path(len(record))
+        with open(path, 'ab') as segment:
+            segment.write(record)
+        self._enforce_retention()
+        logger.debug(f"📼 Recorded {len(values)} samples of {metadata['label']} turning {metadata['state']}")
+
+    def _segment_path(self, record_size):
+        if self._segment is None or os.path.getsize(self._segment) + record_size > self.max_segment_bytes:
+            # Records are fsynced per segment, when it is finished, not per record
+            self._sync(self._segment)
+            segments = list_segments(self.directory)
+            number = int(os.path.basename(segments[-1])[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) + 1 if segments else 1
+            self._segment = os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
+        return self._segment
+
+    def _sync(self, path):
+        if path is None or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'rb') as segment:
+                os.fsync(segment.fileno())
+        except OSError as e:
+            logger.error(f"💥 Flight recorder failed to sync {os.path.basename(path)}: {e}")
+
+    def _enforce_retention(self):
+        segments = list_segments(self.directory)
+        total = sum(os.path.getsize(path) for path in segments)
+        while total > self.max_total_bytes and len(segments) > 1:
+            oldest = segments.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+            logger.info(f"🗑️ Flight recorder removed {os.path.basename(oldest)} to stay under its size cap")
+
+    def stop(self):
+        """Write out pending captures with the samples available now and stop the writer."""
+        for capture in self.pending:
+            self._snapshot(capture)
+        self.pending = []
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+        logger.info(f"📼 Flight recorder stopped after {self.recorded} recordings ({self.dropped} dropped)")
+
+
+def list_segments(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+def load_recordings(directory='logs/flight_recorder', sensor_id=None):
+    """Read recordings back as dicts of metadata plus 'values' and 'timestamps' arrays.
+
+    The arrays are read-only views into memory-mapped segment files, so loading many
+    recordings does not copy their samples.
+    """
+    recordings = []
+    for path in list_segments(directory):
+        if os.path.getsize(path) == 0:
+            continue
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            magic, meta_length, count = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + meta_length + count * 16
+            if magic != RECORD_MAGIC or end > len(data):
+                logger.warning(f"⚠️ Stopped reading {os.path.basename(path)} at a damaged or partial record")
+                break
+            meta_start = offset + RECORD_HEADER.size
+            recording = json.loads(bytes(data[meta_start:meta_start + meta_length]))
+            values_start = meta_start + meta_length
+            if sensor_id is None or recording['sensor_id'] == sensor_id:
+                recording['values'] = np.ndarray((count,), dtype='<f8', buffer=data, offset=values_start)
+                recording['timestamps'] = np.ndarray((count,), dtype='<i8', buffer=data, offset=values_start + count * 8)
+                recordings.append(recording)
+            offset = end
+    return recordings
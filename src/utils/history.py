@@ -0,0 +1,225 @@
+import os
+import math
+import queue
+import threading
+import time
+import numpy as np
+from loguru import logger
+
+# Resolutions kept for every sampled pin: name and bucket length in seconds
+TIERS = (('1s', 1), ('1m', 60), ('1h', 3600))
+
+# One bucket on disk: 28 bytes, start of the bucket in Unix seconds
+BUCKET_DTYPE = np.dtype([
+    ('start', '<i8'),
+    ('count', '<i4'),
+    ('min', '<f4'),
+    ('max', '<f4'),
+    ('mean', '<f4'),
+    ('std', '<f4'),
+])
+
+DEFAULT_RETENTION_DAYS = {'1s': 7, '1m': 90, '1h': 0}  # 0 keeps everything
+COMPACT_SLACK = 1.1  # Let a file grow this far past its retention before rewriting it
+
+class Bucket:
+    """Count, mean, sum of squared deviations, min and max of the samples in one time bucket."""
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def merge(self, count, mean, m2, minimum, maximum):
+        """Fold in the statistics of another set of samples (Chan et al. parallel update)."""
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / self.count) if self.count else 0.0
+
+
+class PinDownsampler:
+    """Turns one pin's raw samples into closed buckets at every tier.
+
+    Raw samples only feed the 1 s tier, in one vectorised pass per batch. Each closed
+    bucket is merged into the next coarser tier, so the 1 min and 1 h tiers never look at
+    raw samples.
+    """
+
+    def __init__(self):
+        self.open = {name: None for name, _ in TIERS}
+
+    def add_samples(self, values, wall_ns):
+        """Add samples with Unix-time nanosecond timestamps; returns {tier: [closed buckets]}."""
+        closed = {name: [] for name, _ in TIERS}
+        if not len(values):
+            return closed
+        seconds = wall_ns // 1_000_000_000
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(seconds)) + 1))
+        counts = np.diff(np.append(starts, len(values)))
+        means = np.add.reduceat(values, starts) / counts
+        deviations = values - np.repeat(means, counts)
+        m2s = np.add.reduceat(deviations * deviations, starts)
+        minima = np.minimum.reduceat(values, starts)
+        maxima = np.maximum.reduceat(values, starts)
+        for second, count, mean, m2, minimum, maximum in zip(seconds[starts], counts, means, m2s, minima, maxima):
+            self._add(0, int(second), int(count), float(mean), float(m2), float(minimum), float(maximum), closed)
+        return closed
+
+    def _add(self, tier_index, timestamp, count, mean, m2, minimum, maximum, closed):
+        name, length = TIERS[tier_index]
+        start = timestamp - timestamp % length
+        bucket = self.open[name]
+        if bucket is not None and bucket.start != start:
+            self._close(tier_index, closed)
+            bucket = None
+        if bucket is None:
+            bucket = self.open[name] = Bucket(start)
+        bucket.merge(count, mean, m2, minimum, maximum)
+
+    def _close(self, tier_index, closed):
+        name, _ = TIERS[tier_index]
+        bucket = self.open[name]
+        self.open[name] = None
+        closed[name].append(bucket)
+        if tier_index + 1 < len(TIERS):
+            self._add(tier_index + 1, bucket.start, bucket.count, bucket.mean, bucket.m2, bucket.min, bucket.max, closed)
+
+    def flush(self):
+        """Close every open bucket, finest tier first, e.g. at shutdown."""
+        closed = {name: [] for name, _ in TIERS}
+        for tier_index, (name, _) in enumerate(TIERS):
+            if self.open[name] is not None:
+                self._close(tier_index, closed)
+        return closed
+
+
+class HistoryRecorder:
+    """Builds min/max/mean/std history of every sampled pin and stores it on disk.
+
+    A thread picks up the samples each board took since its last pass using the buffer
+    sequence numbers, downsamples them, and hands the closed buckets to a writer thread
+    that appends them to one fixed-record file per board, pin and tier. Files are trimmed
+    to their tier's retention. Read them back with read_history().
+    """
+
+    def __init__(self, settings, boards, plans):
+        self.directory = settings.get('DIRECTORY', 'logs/history')
+        self.poll_interval = settings.get('POLL_INTERVAL', 0.5)
+        retention_days = {**DEFAULT_RETENTION_DAYS, **settings.get('RETENTION_DAYS', {})}
+        self.max_buckets = {name: int(retention_days[name] * 86400 / length) for name, length in TIERS}
+        self.boards = boards
+        self.pins = {board_id: sorted(plan) for board_id, plan in plans.items() if board_id in boards}
+        self.downsamplers = {(board_id, pin): PinDownsampler() for board_id, pins in self.pins.items() for pin in pins}
+        self.sequences = {}
+        self.lost_samples = 0
+        # Both clocks are read back to back once; sample timestamps are CLOCK_MONOTONIC
+        self.wall_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll_loop, name='history-downsampler', daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._writer.start()
+        logger.info(f"📈 Recording {len(self.downsamplers)} pins to {self.directory} at " + ", ".join(name for name, _ in TIERS))
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"💥 History downsampler failed: {e}")
+
+    def poll(self):
+        for (board_id, pin), downsampler in self.downsamplers.items():
+            board = self.boards[board_id]
+            with board.lock:
+                sequence = board.buffer.sequence(pin)
+                new = sequence - self.sequences.get((board_id, pin), sequence - board.buffer.available(pin))
+                if new <= 0:
+                    continue
+                if new > board.buffer.capacity:
+                    self.lost_samples += new - board.buffer.capacity
+                    new = board.buffer.capacity
+                values, timestamps = board.buffer.get_samples(pin, new)
+            self.sequences[(board_id, pin)] = sequence
+            self._queue_closed(board_id, pin, downsampler.add_samples(values, timestamps + self.wall_offset_ns))
+
+    def _queue_closed(self, board_id, pin, closed):
+        for name, buckets in closed.items():
+            if buckets:
+                records = np.array([(bucket.start, bucket.count, bucket.min, bucket.max, bucket.mean, bucket.std)
+                                    for bucket in buckets], dtype=BUCKET_DTYPE)
+                self._queue.put((history_path(self.directory, board_id, pin, name), name, records))
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, name, records = item
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'ab') as history_file:
+                    history_file.write(records.tobytes())
+                self._enforce_retention(path, name)
+            except Exception as e:
+                logger.error(f"💥 Failed to write history to {path}: {e}")
+
+    def _enforce_retention(self, path, name):
+        max_buckets = self.max_buckets[name]
+        if not max_buckets:
+            return
+        count = os.path.getsize(path) // BUCKET_DTYPE.itemsize
+        if count <= max_buckets * COMPACT_SLACK:
+            return
+        kept = np.fromfile(path, dtype=BUCKET_DTYPE)[-max_buckets:]
+        temporary = path + '.tmp'
+        kept.tofile(temporary)
+        os.replace(temporary, path)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        for (board_id, pin), downsampler in self.downsamplers.items():
+            self._queue_closed(board_id, pin, downsampler.flush())
+        self._queue.put(None)
+        if self._writer.is_alive():
+            self._writer.join(timeout=10)
+        if self.lost_samples:
+            logger.warning(f"⚠️ History missed {self.lost_samples} samples that were overwritten before it read them")
+        logger.info("📈 History recorder stopped")
+
+
+def history_path(directory, board_id, pin, tier):
+    return os.path.join(directory, board_id, f"pin{pin}_{tier}.bin")
+
+def read_history(board_id, pin, tier='1m', start=None, end=None, directory='logs/history'):
+    """Buckets of a pin between Unix times start and end (inclusive) as a structured NumPy array.
+
+    The file is memory-mapped and the range found by binary search on the bucket starts,
+    so only the requested buckets are read from disk.
+    """
+    path = history_path(directory, board_id, pin, tier)
+    if not os.path.exists(path) or os.path.getsize(path) < BUCKET_DTYPE.itemsize:
+        return np.empty(0, dtype=BUCKET_DTYPE)
+    count = os.path.getsize(path) // BUCKET_DTYPE.itemsize
+    buckets = np.memmap(path, dtype=BUCKET_DTYPE, mode='r', shape=(count,))
+    first = np.searchsorted(buckets['start'], start, side='left') if start is not None else 0
+    last = np.searchsorted(buckets['start'], end, side='right') if end is not None else count
+    return np.array(buckets[first:last])
@@ -0,0 +1,62 @@
+import math
+
+# Recompute the sums from the window every this many windows to stop floating point drift
+RECOMPUTE_INTERVAL = 64
+
+class RollingStats:
+    """Mean and standard deviation over a sliding window, updated in O(1) per sample.
+
+    Uses Welford's running mean / sum of squared deviations, with the oldest sample
+    removed as each new one arrives. The standard deviation matches np.std (ddof=0)
+    over the same window.
+    """
+
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self.reset()
+
+    def reset(self):
+        self.window = [0.0] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._until_recompute = self.window_size * RECOMPUTE_INTERVAL
+
+    def push(self, value):
+        if self.count < self.window_size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.window[self.index]
+            new_mean = self.mean + (value - old) / self.window_size
+            self.m2 += (value - old) * (value - new_mean + old - self.mean)
+            self.mean = new_mean
+        self.window[self.index] = value
+        self.index = (self.index + 1) % self.window_size
+
+        self._until_recompute -= 1
+        if self._until_recompute <= 0:
+            self._recompute()
+
+    def _recompute(self):
+        values = self.window if self.count == self.window_size else self.window[:self.count]
+        mean = math.fsum(values) / len(values)
+        self.m2 = math.fsum((value - mean) ** 2 for value in values)
+        self.mean = mean
+        self._until_recompute = self.window_size * RECOMPUTE_INTERVAL
+
+    @property
+    def is_full(self):
+        return self.count >= self.window_size
+
+    @property
+    def variance(self):
+        count = self.count
+        return max(self.m2, 0.0) / count if count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
@@ -0,0 +1,67 @@
+from loguru import logger
+
+class RoutingTable:
+    """Compiled mapping from active devices to the gates that must be open.
+
+    Every gate gets a bit index and every device the bitmask of its gate_prefs, so the
+    gates for any set of active devices are the OR of their masks: one dict lookup and
+    one integer OR per active device. Results are cached per active set and per mask.
+    Gate indices never move, so compile() with a changed config only rebuilds the masks.
+    """
+
+    MAX_CACHED_SETS = 4096
+
+    def __init__(self):
+        self.gate_index = {}
+        self.gate_names = []
+        self.device_masks = {}
+        self._gate_cache = {}
+        self._active_cache = {}
+
+    def add_gate(self, gate_name):
+        if gate_name not in self.gate_index:
+            self.gate_index[gate_name] = len(self.gate_names)
+            self.gate_names.append(gate_name)
+        return self.gate_index[gate_name]
+
+    def compile(self, devices, gate_names):
+        """Build the masks from (device_id, gate_prefs) pairs for the gates that exist."""
+        for gate_name in gate_names:
+            self.add_gate(gate_name)
+        known = set(gate_names)
+        masks = {}
+        for device_id, gate_prefs in devices:
+            mask = 0
+            for gate_name in gate_prefs:
+                if gate_name in known:
+                    mask |= 1 << self.gate_index[gate_name]
+                else:
+                    logger.warning(f"⚠️ {device_id} routes to unknown gate '{gate_name}'")
+            # Several config entries can share an ID (e.g. a button and its LED)
+            masks[device_id] = masks.get(device_id, 0) | mask
+        self.device_masks = masks
+        self._gate_cache = {}
+        self._active_cache = {}
+        logger.info(f"🧭 Routing compiled for {len(masks)} devices over {len(self.gate_names)} gates")
+
+    def mask_for(self, active_device_ids):
+        mask = 0
+        for device_id in active_device_ids:
+            mask |= self.device_masks.get(device_id, 0)
+        return mask
+
+    def gates_for_mask(self, mask):
+        gates = self._gate_cache.get(mask)
+        if gates is None:
+            gates = [name for index, name in enumerate(self.gate_names) if mask >> index & 1]
+            self._gate_cache[mask] = gates
+        return gates
+
+    def gates_to_open(self, active_device_ids):
+        key = frozenset(active_device_ids)
+        gates = self._active_cache.get(key)
+        if gates is None:
+            if len(self._active_cache) >= self.MAX_CACHED_SETS:
+                self._active_cache = {}
+            gates = self._active_cache[key] = self.gates_for_mask(self.mask_for(key))
+        return gates
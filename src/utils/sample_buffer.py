@@ -0,0 +1,208 @@
+import os
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+SHARED_BUFFER_PREFIX = 'rudi_samples_'
+SHARED_MAGIC = 0x52554449  # "RUDI"
+
+# Slots of the int64 header that sits in front of the sample arrays. It carries the writer's
+# state to readers in other processes, and escalation requests back to the writer.
+HEADER_FIELDS = {
+    'magic': 0,
+    'channels': 1,
+    'capacity': 2,
+    'initialized': 3,
+    'data_rate': 4,
+    'fast_until_ns': 5,
+    'writer_pid': 6,
+    'pin_mask': 7,
+}
+
+def shared_buffer_name(board_id):
+    """Name of the shared memory block holding a board's samples."""
+    return f"{SHARED_BUFFER_PREFIX}{board_id}"
+
+class SampleBuffer:
+    """Preallocated ring buffer holding the newest samples of several channels.
+
+    Every channel keeps a monotonically increasing write count. It is used both to locate
+    the write slot and as a sequence number, so readers can tell whether new data arrived
+    without touching the samples themselves. Each sample has a time.monotonic_ns()
+    timestamp stored in a parallel array.
+
+    The arrays can live in a multiprocessing.shared_memory block (create_shared / attach),
+    so another process can map a board's samples without touching the I2C bus. The writer
+    stores a sample before bumping the count, so a reader never sees a count ahead of its data.
+    The writer keeps going while another process reads, so readers there use get_samples(),
+    which copies and drops whatever the writer overwrote during the copy.
+    """
+
+    def __init__(self, channels, capacity, dtype=np.float64, shm=None, read_only=False):
+        self.channels = channels
+        self.capacity = capacity
+        self.shm = shm
+        self.owner = False
+        self.read_only = read_only
+        if shm is None:
+            buffer = bytearray(self.nbytes(channels, capacity, dtype))
+        else:
+            buffer = shm.buf
+
+        offset = 0
+        arrays = {}
+        for name, shape, array_dtype in self._layout(channels, capacity, dtype):
+            arrays[name] = np.ndarray(shape, dtype=array_dtype, buffer=buffer, offset=offset)
+            offset += int(np.prod(shape)) * np.dtype(array_dtype).itemsize
+        self.header = arrays['header']
+        self.rates = arrays['rates']
+        self.counts = arrays['counts']
+        self.values = arrays['values']
+        self.timestamps = arrays['timestamps']
+
+        if read_only:
+            # Only the header stays writable, so readers can still request escalation
+            for array in (self.rates, self.counts, self.values, self.timestamps):
+                array.flags.writeable = False
+
+    @staticmethod
+    def _layout(channels, capacity, dtype=np.float64):
+        return [
+            ('header', (len(HEADER_FIELDS),), np.int64),
+            ('rates', (channels,), np.float64),
+            ('counts', (channels,), np.int64),
+            ('values', (channels, capacity), dtype),
+            ('timestamps', (channels, capacity), np.int64),
+        ]
+
+    @classmethod
+    def nbytes(cls, channels, capacity, dtype=np.float64):
+        return sum(int(np.prod(shape)) * np.dtype(array_dtype).itemsize
+                   for _, shape, array_dtype in cls._layout(channels, capacity, dtype))
+
+    @classmethod
+    def create_shared(cls, name, channels, capacity):
+        """Create a buffer in a new shared memory block, replacing one left behind by a dead writer."""
+        size = cls.nbytes(channels, capacity)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        buffer = cls(channels, capacity, shm=shm)
+        buffer.owner = True
+        buffer.header[:] = 0
+        buffer.rates[:] = 0
+        buffer.counts[:] = 0
+        buffer.set_field('channels', channels)
+        buffer.set_field('capacity', capacity)
+        buffer.set_field('writer_pid', os.getpid())
+        buffer.set_field('magic', SHARED_MAGIC)
+        return buffer
+
+    @classmethod
+    def attach(cls, name):
+        """Map an existing shared buffer read-only. Raises FileNotFoundError if no writer created it."""
+        shm = shared_memory.SharedMemory(name=name)
+        # Before Python 3.13 attaching registers the block with this process's resource tracker,
+        # which would unlink it from under the writer when this process exits
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        header = np.ndarray((len(HEADER_FIELDS),), dtype=np.int64, buffer=shm.buf)
+        if header[HEADER_FIELDS['magic']] != SHARED_MAGIC:
+            del header
+            shm.close()
+            raise ValueError(f"Shared memory block '{name}' is not a sample buffer")
+        channels = int(header[HEADER_FIELDS['channels']])
+        capacity = int(header[HEADER_FIELDS['capacity']])
+        del header
+        return cls(channels, capacity, shm=shm, read_only=True)
+
+    def get_field(self, name):
+        return int(self.header[HEADER_FIELDS[name]])
+
+    def set_field(self, name, value):
+        self.header[HEADER_FIELDS[name]] = value
+
+    def close(self):
+        """Release the shared memory mapping; the writer also removes the block."""
+        if self.shm is None:
+            return
+        # The NumPy views must go before the mapping can be closed
+        self.header = self.rates = self.counts = self.values = self.timestamps = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A caller still holds a window view; the mapping goes away with the process
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
+
+    def push(self, channel, value, timestamp_ns):
+        count = self.counts[channel]
+        index = count % self.capacity
+        self.values[channel, index] = value
+        self.timestamps[channel, index] = timestamp_ns
+        self.counts[channel] = count + 1
+
+    def sequence(self, channel):
+        """Total number of samples ever written to a channel."""
+        return int(self.counts[channel])
+
+    def available(self, channel):
+        """Number of samples currently held for a channel."""
+        return min(int(self.counts[channel]), self.capacity)
+
+    def get_window(self, channel, n):
+        """Return the newest n samples of a channel, oldest first.
+
+        The result is a view into the buffer when the window does not wrap around the end
+        of the ring, otherwise a single copy of n samples. A view is only valid while nothing
+        writes to the channel, i.e. while the writer's lock is held; use get_samples() otherwise.
+        """
+        return self._window(self.values, channel, n)
+
+    def get_samples(self, channel, n):
+        """Copies of the newest n samples of a channel and their timestamps, taken together.
+
+        On a buffer attached from another process the writer does not wait for us, so the
+        count is read again after copying and any slot it may have reached is dropped from
+        the front. Both arrays always describe the same samples.
+        """
+        count = int(self.counts[channel])
+        values = np.array(self._window(self.values, channel, n, count))
+        timestamps = np.array(self._window(self.timestamps, channel, n, count))
+        if self.read_only:
+            # The writer may be storing slot counts[channel] right now, hence the + 1
+            overwritten = int(self.counts[channel]) - count + 1 - (self.capacity - len(values))
+            if overwritten > 0:
+                values, timestamps = values[overwritten:], timestamps[overwritten:]
+        return values, timestamps
+
+    def get_timestamps(self, channel, n):
+        """Timestamps (monotonic ns) matching get_window(channel, n)."""
+        return self._window(self.timestamps, channel, n)
+
+    def get_window_matrix(self, channels, n):
+        """Newest n samples of several channels as a (len(channels), n) array, oldest first.
+
+        Gathered with one fancy-indexing copy. n is cut down to what the emptiest of the
+        channels holds so every row covers the same number of samples.
+        """
+        channels = np.asarray(channels, dtype=np.intp)
+        counts = self.counts[channels]
+        n = int(min(n, self.capacity, counts.min())) if len(channels) else 0
+        offsets = counts[:, None] - n + np.arange(n)
+        return self.values[channels[:, None], offsets % self.capacity]
+
+    def _window(self, array, channel, n, count=None):
+        count = int(self.counts[channel]) if count is None else count
+        n = min(n, count, self.capacity)
+        end = (count - 1) % self.capacity + 1 if count else 0
+        start = end - n
+        if start >= 0:
+            return array[channel, start:end]
+        return np.concatenate((array[channel, start:], array[channel, :end]))
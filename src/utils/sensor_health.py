@@ -0,0 +1,121 @@
+import time
+
+# Health states, most severe first; a sensor reports the first one that applies
+STALLED = 'stalled'
+READ_ERRORS = 'read_errors'
+RAILED_LOW = 'railed_low'
+RAILED_HIGH = 'railed_high'
+FLATLINE = 'flatline'
+BASELINE_JUMP = 'baseline_jump'
+OK = 'ok'
+UNKNOWN = 'unknown'
+
+SEVERITY = (STALLED, READ_ERRORS, RAILED_LOW, RAILED_HIGH, FLATLINE, BASELINE_JUMP)
+
+DEFAULT_SETTINGS = {
+    'FLATLINE_SECONDS': 10.0,      # No change beyond the tolerance for this long means a stuck input
+    'FLATLINE_TOLERANCE': 0.0,     # Volts; 0 means bit-identical readings
+    'RAIL_MARGIN': 0.02,           # Volts from 0 V or the top of the input range that count as railed
+    'BASELINE_TIME_CONSTANT': 60.0,
+    'BASELINE_JUMP': 0.2,          # Volts between the short-term mean and the slow baseline
+    'JUMP_HOLD_SECONDS': 30.0,     # How long a baseline jump keeps being reported
+    'MAX_ERROR_RATIO': 0.1,        # Failed reads per attempted read over a check interval
+    'STALL_SECONDS': 5.0,          # No new samples for this long
+}
+
+class SensorHealthMonitor:
+    """Tells a disconnected, stuck or railed input apart from a tool that is simply off.
+
+    It adds no per-sample work: check() runs from the control loop and reads the window
+    mean and std of the RollingStats the sensor's detector already keeps, plus the pin's
+    sample count. A window pinned at 0 V or the rail, or one whose std stays within the
+    flatline tolerance, is flagged; the slow baseline is updated per check.
+    """
+
+    def __init__(self, stats, settings=None, rail_voltage=3.3):
+        """rail_voltage is the highest reading the input can produce: the supply voltage or the
+        gain's full scale, whichever is lower."""
+        self.stats = stats
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.flatline_seconds = settings['FLATLINE_SECONDS']
+        self.flatline_tolerance = settings['FLATLINE_TOLERANCE']
+        self.rail_low = settings['RAIL_MARGIN']
+        self.rail_high = rail_voltage - settings['RAIL_MARGIN']
+        self.baseline_time_constant = settings['BASELINE_TIME_CONSTANT']
+        self.baseline_jump = settings['BASELINE_JUMP']
+        self.jump_hold = settings['JUMP_HOLD_SECONDS']
+        self.max_error_ratio = settings['MAX_ERROR_RATIO']
+        self.stall_seconds = settings['STALL_SECONDS']
+        self.reset()
+
+    def reset(self):
+        """Forget the history; the stats belong to the detector and are reset with it."""
+        self.mean = None
+        self.baseline = None
+        self.jump_until = 0.0
+        self.last_check = None
+        self.checked_count = None
+        self.checked_errors = None
+        self.last_sample_time = None
+        self.last_change_time = None
+        self.state = UNKNOWN
+        self.issues = []
+
+    def check(self, sample_count, read_errors=None, now=None):
+        """Update and return the health state from the pin's total samples and failed reads so far."""
+        now = time.monotonic() if now is None else now
+        issues = []
+        new_samples = sample_count - self.checked_count if self.checked_count is not None else 0
+        if new_samples or self.last_sample_time is None:
+            self.last_sample_time = now
+        has_window = self.stats.count > 0
+        if has_window:
+            self.mean = self.stats.mean
+        if self.last_change_time is None or (has_window and self.stats.std > self.flatline_tolerance):
+            self.last_change_time = now
+
+        if self.last_sample_time is not None and now - self.last_sample_time > self.stall_seconds:
+            issues.append(STALLED)
+        if read_errors is not None and self.checked_errors is not None:
+            errors = read_errors - self.checked_errors
+            if errors and errors / (errors + new_samples) > self.max_error_ratio:
+                issues.append(READ_ERRORS)
+        if new_samples and has_window:
+            if self.mean <= self.rail_low:
+                issues.append(RAILED_LOW)
+            elif self.mean >= self.rail_high:
+                issues.append(RAILED_HIGH)
+            if now - self.last_change_time > self.flatline_seconds:
+                issues.append(FLATLINE)
+
+            if self.baseline is None:
+                self.baseline = self.mean
+            else:
+                elapsed = now - self.last_check if self.last_check is not None else 0.0
+                if abs(self.mean - self.baseline) > self.baseline_jump:
+                    # Report the jump for a while, then accept the new level as the baseline
+                    self.jump_until = now + self.jump_hold
+                    self.baseline = self.mean
+                else:
+                    self.baseline += min(elapsed / self.baseline_time_constant, 1.0) * (self.mean - self.baseline)
+            if now < self.jump_until:
+                issues.append(BASELINE_JUMP)
+
+        self.checked_count = sample_count
+        self.checked_errors = read_errors
+        self.last_check = now
+
+        self.issues = issues
+        if issues:
+            self.state = min(issues, key=SEVERITY.index)
+        elif new_samples:
+            self.state = OK
+        return self.state
+
+    def report(self):
+        return {
+            'state': self.state,
+            'issues': list(self.issues),
+            'baseline': self.baseline,
+            'short_term_mean': self.mean,
+        }
@@ -0,0 +1,73 @@
+import math
+import time
+
+class Timer:
+    def __init__(self, deadline_tick, callback):
+        self.deadline_tick = deadline_tick
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timing wheel for one-shot timers, driven from the control loop.
+
+    Timers are hashed into slots by their deadline tick, so scheduling and cancelling are
+    O(1) and advance() only looks at the slots of the ticks that passed. Nothing runs in
+    the background: callbacks fire from advance(), in the thread that calls it.
+    """
+
+    def __init__(self, tick=0.01, slots=256):
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.current_tick = int(time.monotonic() / tick)
+        self.pending = 0
+
+    def schedule(self, delay, callback, now=None):
+        """Call callback() once delay seconds have passed; returns the Timer, which can be cancelled."""
+        now = time.monotonic() if now is None else now
+        deadline_tick = max(math.ceil((now + delay) / self.tick), self.current_tick + 1)
+        timer = Timer(deadline_tick, callback)
+        self.slots[deadline_tick % len(self.slots)].append(timer)
+        self.pending += 1
+        return timer
+
+    def advance(self, now=None):
+        """Fire every timer whose deadline has passed; returns how many fired."""
+        now = time.monotonic() if now is None else now
+        target_tick = int(now / self.tick)
+        if target_tick <= self.current_tick or not self.pending:
+            self.current_tick = max(self.current_tick, target_tick)
+            return 0
+        # After a full turn every slot has been visited, so a long stall costs one pass
+        steps = min(target_tick - self.current_tick, len(self.slots))
+        due = []
+        for step in range(1, steps + 1):
+            index = (self.current_tick + step) % len(self.slots)
+            slot = self.slots[index]
+            if not slot:
+                continue
+            keep = []
+            for timer in slot:
+                if timer.cancelled:
+                    self.pending -= 1
+                elif timer.deadline_tick <= target_tick:
+                    self.pending -= 1
+                    due.append(timer)
+                else:
+                    keep.append(timer)  # Due on a later turn of the wheel
+            self.slots[index] = keep
+        self.current_tick = target_tick
+        due.sort(key=lambda timer: timer.deadline_tick)
+        for timer in due:
+            timer.callback()
+        return len(due)
+
+    def next_deadline(self):
+        """Monotonic time of the earliest pending timer, or None when nothing is scheduled."""
+        if not self.pending:
+            return None
+        deadlines = [timer.deadline_tick for slot in self.slots for timer in slot if not timer.cancelled]
+        return min(deadlines) * self.tick if deadlines else None
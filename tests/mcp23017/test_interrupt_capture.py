@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from boards.fake_mcp23017 import FakeMCP23017, FakeGPIO
+from boards.mcp23017 import MCP23017
+from managers.button_manager import ButtonManager
+from utils.debouncer import PRESS, RELEASE
+
+INTERRUPT_PIN = 17
+BOARD_CONFIG = {'i2c_address': '0x20', 'label': 'Fake Expander', 'interrupt_pin': INTERRUPT_PIN}
+BUTTON_CONFIG = [{'type': 'button', 'id': 'test_button', 'label': 'Test Button',
+                  'connection': {'board': 'fake_expander', 'pin': 3}}]
+APP_CONFIG = {'BUTTON_SETTINGS': {'INPUT_MODE': 'interrupt', 'POLL_INTERVAL': 0.005,
+                                  'SAFETY_POLL_INTERVAL': 1.0, 'ACTIVE_TIME': 0.2}}
+
+
+def make_board(gpio=None):
+    chip = FakeMCP23017(gpio, INTERRUPT_PIN)
+    return chip, MCP23017(None, BOARD_CONFIG, {}, mcp=chip, device=chip)
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+def test_intcap_keeps_a_press_that_is_already_over():
+    chip, board = make_board()
+    board.enable_interrupts(1 << 3)
+    chip.press(3)
+    chip.release(3)
+    captured, current = board.read_interrupt_capture()
+    assert not captured >> 3 & 1  # Low while pressed when the interrupt fired
+    assert current >> 3 & 1
+    assert not chip.pending
+
+
+def test_short_press_is_debounced_through_the_interrupt_path():
+    gpio = FakeGPIO()
+    chip, board = make_board(gpio)
+    manager = ButtonManager(BUTTON_CONFIG, {'fake_expander': board}, APP_CONFIG, gpio=gpio)
+    events = []
+    manager.add_event_listener(lambda button, event: events.append(event))
+    manager.start_polling()
+    try:
+        assert wait_for(lambda: INTERRUPT_PIN in gpio.callbacks)
+        # Released again before the polling thread gets to read the port
+        chip.press(3)
+        chip.release(3)
+        assert wait_for(lambda: RELEASE in events)
+        assert events == [PRESS, RELEASE]
+    finally:
+        manager.stop_polling()
+
+
+def test_bounces_within_the_debounce_time_make_one_press():
+    gpio = FakeGPIO()
+    chip, board = make_board(gpio)
+    manager = ButtonManager(BUTTON_CONFIG, {'fake_expander': board}, APP_CONFIG, gpio=gpio)
+    events = []
+    manager.add_event_listener(lambda button, event: events.append(event))
+    manager.start_polling()
+    try:
+        assert wait_for(lambda: INTERRUPT_PIN in gpio.callbacks)
+        for _ in range(3):
+            chip.press(3)
+            chip.release(3)
+        chip.press(3)
+        assert wait_for(lambda: PRESS in events)
+        time.sleep(0.1)
+        assert events == [PRESS]
+    finally:
+        manager.stop_polling()
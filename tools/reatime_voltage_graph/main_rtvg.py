@@ -1,6 +1,7 @@
 # tools/realtime_voltage_graph/main_rtvg.py
 
 import sys
+import os
 import time
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QComboBox,
                              QPushButton, QLineEdit, QSlider, QHBoxLayout, QMessageBox)
@@ -13,6 +14,11 @@ import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
+
+from boards.remote_ads import RemoteADSBoard
+
 ADS1X15_DATA_RATES = {
     'ADS1115': [8, 16, 32, 64, 128, 250, 475, 860],
     'ADS1015': [128, 250, 490, 920, 1600, 2400, 3300]
@@ -45,6 +51,10 @@ class SetupDialog(QWidget):
         self.layout.addWidget(QLabel('Pin Selection:'))
         self.layout.addWidget(self.pin_selection)
 
+        self.attach_input = QLineEdit('')
+        self.layout.addWidget(QLabel('Attach to running daemon (board ID, blank to open the bus):'))
+        self.layout.addWidget(self.attach_input)
+
         self.test_button = QPushButton('Test Board')
         self.layout.addWidget(self.test_button)
 
@@ -95,7 +105,11 @@ class RealtimeVoltageGraph(QMainWindow):
         self.layout.addWidget(self.plot_widget)
 
         self.setup_plot()
-        self.setup_ads1115()
+        self.remote = None
+        if self.config.get('attach'):
+            self.setup_remote()
+        else:
+            self.setup_ads1115()
         self.setup_data_collection()
 
     def setup_plot(self):
@@ -123,6 +137,35 @@ class RealtimeVoltageGraph(QMainWindow):
             logger.error(f"Error initializing ADS1115: {e}")
             raise
 
+    def setup_remote(self):
+        try:
+            self.remote = RemoteADSBoard({'id': self.config['attach'], 'label': self.config['attach']})
+            self.start_ns = time.monotonic_ns()
+            self.last_sequences = [self.remote.get_sequence(pin) for pin in range(4)]
+            self.channel_times = [[] for _ in range(4)]
+            logger.info(f"Attached to board {self.config['attach']} of the running acquisition process")
+        except Exception as e:
+            logger.error(f"Error attaching to board {self.config['attach']}: {e}")
+            raise
+
+    def collect_remote(self):
+        """Append the samples published since the last update, with their real timestamps."""
+        for pin in range(4):
+            sequence = self.remote.get_sequence(pin)
+            new = sequence - self.last_sequences[pin]
+            self.last_sequences[pin] = sequence
+            if new <= 0:
+                continue
+            values, timestamps = self.remote.get_samples(pin, new)
+            self.data[pin].extend(values.tolist())
+            self.channel_times[pin].extend(((timestamps - self.start_ns) / 1e9).tolist())
+
+        cutoff = (time.monotonic_ns() - self.start_ns) / 1e9 - int(self.config['plot_length'])
+        for pin in range(4):
+            keep = next((i for i, t in enumerate(self.channel_times[pin]) if t >= cutoff), len(self.channel_times[pin]))
+            self.channel_times[pin] = self.channel_times[pin][keep:]
+            self.data[pin] = self.data[pin][keep:]
+
     def setup_data_collection(self):
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_plot)
@@ -135,47 +178,56 @@ class RealtimeVoltageGraph(QMainWindow):
         elapsed_time = current_time - self.start_time
         time_since_last_update = current_time - self.last_update_time
 
-        samples_to_collect = int(time_since_last_update * 128)  # 128 SPS
-
-        new_times = np.linspace(self.last_update_time - self.start_time, elapsed_time, samples_to_collect)
-        self.times.extend(new_times)
-
-        for i, channel in enumerate(self.channels):
-            try:
-                new_data = [channel.voltage for _ in range(samples_to_collect)]
-                self.data[i].extend(new_data)
-            except Exception as e:
-                logger.warning(f"Error reading channel {i}: {e}")
-                self.data[i].extend([self.data[i][-1] if self.data[i] else 0] * samples_to_collect)
-
-        # Limit data points based on plot length
-        max_data_points = 128 * int(self.config['plot_length'])
-        if len(self.times) > max_data_points:
-            self.times = self.times[-max_data_points:]
-            for i in range(len(self.data)):
-                self.data[i] = self.data[i][-max_data_points:]
+        if self.remote:
+            self.collect_remote()
+            elapsed_time = (time.monotonic_ns() - self.start_ns) / 1e9
+        else:
+            samples_to_collect = int(time_since_last_update * 128)  # 128 SPS
+
+            new_times = np.linspace(self.last_update_time - self.start_time, elapsed_time, samples_to_collect)
+            self.times.extend(new_times)
+
+            for i, channel in enumerate(self.channels):
+                try:
+                    new_data = [channel.voltage for _ in range(samples_to_collect)]
+                    self.data[i].extend(new_data)
+                except Exception as e:
+                    logger.warning(f"Error reading channel {i}: {e}")
+                    self.data[i].extend([self.data[i][-1] if self.data[i] else 0] * samples_to_collect)
+
+            # Limit data points based on plot length
+            max_data_points = 128 * int(self.config['plot_length'])
+            if len(self.times) > max_data_points:
+                self.times = self.times[-max_data_points:]
+                for i in range(len(self.data)):
+                    self.data[i] = self.data[i][-max_data_points:]
 
         self.update_y_range()
 
         pin_selection = self.config['pin_selection']
         if pin_selection == 'All':
             for i, curve in enumerate(self.curves):
-                curve.setData(self.times, self.data[i])
+                curve.setData(self.curve_times(i), self.data[i])
                 curve.show()
-            print(f"Last values - A0: {self.data[0][-1]:.6f}V, A1: {self.data[1][-1]:.6f}V, A2: {self.data[2][-1]:.6f}V, A3: {self.data[3][-1]:.6f}V")
+            # Pins the daemon does not sample have no data when attached
+            print("Last values - " + ", ".join(f"A{i}: {channel[-1]:.6f}V" for i, channel in enumerate(self.data) if channel))
         else:
             pin = int(pin_selection.split()[-1])
             for i, curve in enumerate(self.curves):
                 if i == pin:
-                    curve.setData(self.times, self.data[i])
+                    curve.setData(self.curve_times(i), self.data[i])
                     curve.show()
-                    print(f"Last value - A{pin}: {self.data[pin][-1]:.6f}V")
+                    if self.data[pin]:
+                        print(f"Last value - A{pin}: {self.data[pin][-1]:.6f}V")
                 else:
                     curve.hide()
 
         self.plot_widget.setXRange(max(0, elapsed_time - int(self.config['plot_length'])), elapsed_time)
         self.last_update_time = current_time
 
+    def curve_times(self, channel):
+        return self.channel_times[channel] if self.remote else self.times
+
     def update_y_range(self):
         if not any(self.data):
             return
@@ -233,7 +285,8 @@ def main():
             'data_rate': setup_dialog.data_rate.currentText(),
             'plot_length': setup_dialog.plot_length.value(),
             'margin': setup_dialog.margin.value(),
-            'pin_selection': setup_dialog.pin_selection.currentText()
+            'pin_selection': setup_dialog.pin_selection.currentText(),
+            'attach': setup_dialog.attach_input.text().strip()
         }
         setup_dialog.close()
         main_window = RealtimeVoltageGraph(config)
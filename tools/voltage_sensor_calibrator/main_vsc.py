@@ -21,6 +21,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 # Import the ConfigLoader
 from utils.config_loader import ConfigLoader
+from boards.remote_ads import RemoteADSBoard
 
 # Import local modules
 from core.data_collection import DataCollectionThread
@@ -45,6 +46,17 @@ class ADS1015Wrapper:
         chan = AnalogIn(self.ads, getattr(ADS1015_MODULE, f'P{pin}'))
         return chan.voltage
 
+class RemoteBoardWrapper:
+    """Reads the newest sample the running R.U.D.I. acquisition process published for a pin."""
+    def __init__(self, board):
+        self.board = board
+
+    def get_reading(self, pin):
+        window = self.board.get_window(pin, 1)
+        if not len(window):
+            raise ValueError(f"No samples published for pin {pin} yet")
+        return float(window[-1])
+
 
 
 class CalibrationTool:
@@ -111,6 +123,13 @@ class CalibrationTool:
         board_id = board_config['id']
         logger.debug(f"Board ID for device {device_id}: {board_id}")
         if board_id not in self.boards:
+            try:
+                # Share the live daemon's samples instead of fighting it for the bus
+                self.boards[board_id] = RemoteBoardWrapper(RemoteADSBoard(board_config, attach_timeout=0))
+                logger.info(f"Board {board_id} attached to the running acquisition process")
+                return self.boards[board_id]
+            except (FileNotFoundError, ValueError):
+                pass
             logger.info(f"Board {board_id} not initialized. Initializing now.")
             if board_config['type'] == 'ADS1115':
                 ads_class = ADS1115Wrapper